@@ -39,17 +39,20 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework.authtoken',
-    'core',
+    'core.apps.CoreConfig',
     'user',
-    'recipe',
+    'recipe.apps.RecipeConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Serves anonymous public endpoints without the middleware below
+    'core.middleware.BypassMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -88,6 +91,66 @@ DATABASES = {
     }
 }
 
+# Read replicas, as a comma separated list of hosts sharing the credentials
+# above. Safe-method requests read from a random replica, see
+# core/routers.py; after a write the client is pinned to the primary for
+# REPLICA_PIN_SECONDS so it reads its own writes despite replication lag
+# (with several workers the pins need a shared CACHE_BACKEND).
+REPLICA_DATABASES = []
+for index, host in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    alias = f'replica_{index}'
+    DATABASES[alias] = dict(DATABASES['default'], HOST=host.strip())
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+# Per-process memory by default; point CACHE_BACKEND/CACHE_LOCATION at a
+# shared cache (e.g. memcached) when running more than one worker
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+    # Shared tag/ingredient catalog lookups, see recipe/catalog.py
+    'catalog': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'catalog'),
+        'KEY_PREFIX': 'catalog',
+    },
+    # Login throttling history, see user/throttles.py
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+    },
+}
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/2.2/topics/auth/passwords/
+# New passwords use the first hasher. Hashes made by the others are still
+# accepted and re-hashed with the first one on the user's next login.
+# Override with a comma separated PASSWORD_HASHERS environment variable.
+
+PASSWORD_HASHERS = os.environ.get(
+    'PASSWORD_HASHERS',
+    'django.contrib.auth.hashers.Argon2PasswordHasher,'
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher,'
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher,'
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher'
+).split(',')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -132,3 +195,45 @@ MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
 AUTH_USER_MODEL = 'core.User'
+
+# Lifetime of API tokens in seconds, see core/authentication.py
+TOKEN_TTL = int(os.environ.get('TOKEN_TTL', 7 * 24 * 60 * 60))
+
+# Stateless signed tokens: how long they authenticate, and how long after
+# being issued they can still be exchanged for a new one
+SIGNED_TOKEN_TTL = int(os.environ.get('SIGNED_TOKEN_TTL', 15 * 60))
+SIGNED_TOKEN_REFRESH_TTL = int(
+    os.environ.get('SIGNED_TOKEN_REFRESH_TTL', 24 * 60 * 60)
+)
+
+# Seconds browsers and CDNs may cache shared recipes before revalidating
+# them with their ETag, see recipe.views.PublicRecipeView
+PUBLIC_RECIPE_MAX_AGE = int(os.environ.get('PUBLIC_RECIPE_MAX_AGE', 300))
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    # orjson-backed JSON (stdlib fallback), swap back to
+    # rest_framework.renderers.JSONRenderer/parsers.JSONParser to disable
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # 401 for writes and reads by signed-token users deleted meanwhile
+    'EXCEPTION_HANDLER': 'core.exceptions.exception_handler',
+    # Reverse proxies in front of the app whose X-Forwarded-For entries
+    # are trusted; with 0, throttles key on REMOTE_ADDR and a client
+    # can't dodge the per-IP login limit with a forged header
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+    # Sliding window limits on the token endpoint, see user/throttles.py
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get('LOGIN_IP_RATE', '20/min'),
+        'login_email': os.environ.get('LOGIN_EMAIL_RATE', '5/min'),
+    },
+}
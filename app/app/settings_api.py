@@ -0,0 +1,50 @@
+"""
+Django settings for processes that only serve the API.
+
+Same as app.settings without the admin and the session, message and
+CSRF machinery the token-authenticated API never uses. Run API workers
+with DJANGO_SETTINGS_MODULE=app.settings_api and keep app.settings for
+the admin and manage.py; `manage.py bench_api_profile` compares the two.
+"""
+
+from app.settings import *  # noqa: F401,F403
+
+BROWSER_APPS = (
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+)
+
+INSTALLED_APPS = [
+    app for app in INSTALLED_APPS  # noqa: F405
+    if app not in BROWSER_APPS
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.BypassMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+]
+
+ROOT_URLCONF = 'app.urls_api'
+
+# Copied rather than edited in place, app.settings shares the dicts
+TEMPLATES = [dict(
+    TEMPLATES[0],  # noqa: F405
+    OPTIONS={'context_processors': [
+        'django.template.context_processors.debug',
+        'django.template.context_processors.request',
+        'django.contrib.auth.context_processors.auth',
+    ]},
+)]
+
+# Without sessions DRF's default SessionAuthentication can't succeed,
+# views that don't pick their own authenticators use tokens instead
+REST_FRAMEWORK = dict(
+    REST_FRAMEWORK,  # noqa: F405
+    DEFAULT_AUTHENTICATION_CLASSES=(
+        'core.authentication.ExpiringTokenAuthentication',
+        'core.authentication.SignedTokenAuthentication',
+    ),
+)
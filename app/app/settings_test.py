@@ -0,0 +1,39 @@
+"""
+Django settings used by `manage.py test`.
+
+Same as app.settings, with shortcuts that only make sense for throwaway
+test databases.
+"""
+
+from app.settings import *  # noqa: F401,F403
+
+# Hashing with Argon2/PBKDF2 is slow on purpose, and the tests create a
+# user in almost every setUp. MD5 is unsafe for real passwords but fine
+# for test fixtures.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+# A second connection to the test database standing in for a replica, so
+# routing can be tested with real queries. Tests enable it with
+# override_settings(REPLICA_DATABASES=['replica']).
+DATABASES['replica'] = dict(  # noqa: F405
+    DATABASES['default'],  # noqa: F405
+    TEST={'MIRROR': 'default'}
+)
+
+# Catalog rows are rolled back after every test but cached catalog ids
+# would outlive them, so only the tests of the cache itself enable it
+CACHES['catalog'] = {  # noqa: F405
+    'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+# Uploads stay in memory instead of MEDIA_ROOT, so tests leave no files
+# behind and `manage.py test --parallel` processes can't clash on names
+DEFAULT_FILE_STORAGE = 'core.storage.InMemoryStorage'
+
+# Each parallel test process gets its own database clone, so it needs its
+# own cache as well even when CACHE_BACKEND points at a shared server
+CACHES['default'] = {  # noqa: F405
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}
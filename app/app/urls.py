@@ -14,14 +14,15 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path
 from django.conf.urls.static import static
 from django.conf import settings
 
+from app.urls_api import api_urlpatterns
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/user/', include('user.urls')),
-    path('api/recipe/', include('recipe.urls')),
+    *api_urlpatterns,
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 # According to docs, static() is supposed to be for debug use only,
@@ -0,0 +1,16 @@
+"""URL configuration of app.settings_api, the API without the admin.
+
+app.urls serves the same patterns next to the admin.
+"""
+from django.conf import settings
+from django.conf.urls.static import static
+from django.urls import path, include
+
+api_urlpatterns = [
+    path('api/user/', include('user.urls')),
+    path('api/recipe/', include('recipe.urls')),
+]
+
+urlpatterns = api_urlpatterns + static(
+    settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
+)
@@ -32,3 +32,6 @@ admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Tag)
 admin.site.register(models.Ingredient)
 admin.site.register(models.Recipe)
+admin.site.register(models.CatalogTag)
+admin.site.register(models.CatalogIngredient)
+admin.site.register(models.Unit)
@@ -0,0 +1,204 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, \
+    TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+
+SIGNED_TOKEN_SALT = 'core.authentication.signed-token'
+
+
+class RevocationSet:
+    """Bounded in-process set of revoked token keys (or user ids).
+
+    Entries only need to outlive the tokens they reject, after that
+    expiry rejects the token anyway, so each key is dropped after the
+    lifetime named by ttl_setting.
+    """
+
+    def __init__(self, max_size=100000, ttl_setting='TOKEN_TTL'):
+        self.max_size = max_size
+        self.ttl_setting = ttl_setting
+        self._expires = {}  # key -> monotonic expiry, oldest first
+        self._lock = threading.Lock()
+
+    def add(self, key):
+        """Mark a token key as revoked"""
+        now = time.monotonic()
+        with self._lock:
+            self._expires.pop(key, None)
+            self._expires[key] = now + getattr(settings, self.ttl_setting)
+            while len(self._expires) > self.max_size or \
+                    next(iter(self._expires.values())) <= now:
+                del self._expires[next(iter(self._expires))]
+
+    def discard(self, key):
+        """Accept a key again"""
+        with self._lock:
+            self._expires.pop(key, None)
+
+    def clear(self):
+        """Forget every revoked key"""
+        with self._lock:
+            self._expires.clear()
+
+    def __contains__(self, key):
+        expires = self._expires.get(key)
+        return expires is not None and expires > time.monotonic()
+
+
+revoked_tokens = RevocationSet()
+# Ids of deleted or deactivated users, whose signed tokens are otherwise
+# valid until they expire; kept up to date by core/signals.py
+revoked_users = RevocationSet(ttl_setting='SIGNED_TOKEN_TTL')
+
+
+def token_expired(token, now=None):
+    """Return True if token is older than TOKEN_TTL"""
+    now = now or timezone.now()
+    return now - token.created > timedelta(seconds=settings.TOKEN_TTL)
+
+
+def issue_token(user):
+    """Return a valid token for user, rotating it if it has expired"""
+    token, created = Token.objects.get_or_create(user=user)
+    if not created and token_expired(token):
+        revoke_token(token)
+        token = Token.objects.create(user=user)
+
+    return token
+
+
+def revoke_token(token):
+    """Delete token and reject its key in this process without a query"""
+    revoked_tokens.add(token.key)
+    Token.objects.filter(pk=token.pk).delete()
+
+
+def revoke_user_tokens(user, keep=None):
+    """Revoke every database token of user except keep"""
+    tokens = Token.objects.filter(user=user)
+    if keep is not None:
+        tokens = tokens.exclude(pk=keep.pk)
+
+    keys = list(tokens.values_list('key', flat=True))
+    for key in keys:
+        revoked_tokens.add(key)
+    if keys:
+        Token.objects.filter(key__in=keys).delete()
+
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication with expiry, rolling refresh and revocation.
+
+    Tokens expire TOKEN_TTL seconds after they were issued or last
+    refreshed. Using a token in the second half of its lifetime moves
+    `created` forward, so active clients stay logged in at the cost of at
+    most one UPDATE per half lifetime.
+    """
+
+    def authenticate_credentials(self, key):
+        if key in revoked_tokens:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        user, token = super().authenticate_credentials(key)
+
+        now = timezone.now()
+        if token_expired(token, now):
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+        if now - token.created > timedelta(seconds=settings.TOKEN_TTL / 2):
+            Token.objects.filter(pk=token.pk).update(created=now)
+            token.created = now
+
+        return (user, token)
+
+
+def _password_fingerprint(user):
+    """Return a short digest that changes whenever the password does"""
+    return salted_hmac(SIGNED_TOKEN_SALT, user.password).hexdigest()[:12]
+
+
+def issue_signed_token(user):
+    """Return a stateless token for user, valid for SIGNED_TOKEN_TTL"""
+    return signing.dumps(
+        {'uid': user.pk, 'pwd': _password_fingerprint(user)},
+        salt=SIGNED_TOKEN_SALT,
+        compress=True
+    )
+
+
+def refresh_signed_token(key):
+    """Return a new signed token for a token issued less than
+    SIGNED_TOKEN_REFRESH_TTL ago, or raise AuthenticationFailed.
+
+    Unlike authentication this reads the user, so deactivated accounts and
+    changed passwords stop a token from being refreshed.
+    """
+    try:
+        claims = signing.loads(
+            key, salt=SIGNED_TOKEN_SALT,
+            max_age=settings.SIGNED_TOKEN_REFRESH_TTL
+        )
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+    user = get_user_model().objects.filter(
+        pk=claims['uid'], is_active=True
+    ).first()
+    if user is None or claims['pwd'] != _password_fingerprint(user):
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+    return issue_signed_token(user)
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """Stateless authentication with tokens from issue_signed_token().
+
+    Clients send `Authorization: Bearer <token>`. The signature and age
+    are checked without touching the database; request.user is a User
+    whose fields other than the pk are deferred, so they are only loaded
+    if a view actually reads them. Users deleted or deactivated in this
+    process are rejected through revoked_users; writes and deferred reads
+    by users deleted elsewhere fail with 401 in
+    core.exceptions.exception_handler.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            msg = _('Invalid token header.')
+            raise exceptions.AuthenticationFailed(msg)
+
+        try:
+            claims = signing.loads(
+                auth[1].decode(), salt=SIGNED_TOKEN_SALT,
+                max_age=settings.SIGNED_TOKEN_TTL
+            )
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+        except (signing.BadSignature, UnicodeError):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if claims['uid'] in revoked_users:
+            msg = _('User inactive or deleted.')
+            raise exceptions.AuthenticationFailed(msg)
+
+        user_model = get_user_model()
+        user = user_model.from_db(
+            user_model.objects.db, ['id'], [claims['uid']]
+        )
+
+        return (user, None)
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.views import exception_handler as drf_exception_handler
+
+from core.authentication import SignedTokenAuthentication
+
+
+def _user_vanished(request):
+    """Return True if request was authenticated by a signed token whose
+    user has since been deleted or deactivated"""
+    authenticator = getattr(request, 'successful_authenticator', None)
+    if not isinstance(authenticator, SignedTokenAuthentication):
+        return False
+
+    return not get_user_model().objects.filter(
+        pk=request.user.pk, is_active=True
+    ).exists()
+
+
+def exception_handler(exc, context):
+    """DRF's exception handler, answering 401 instead of 500 when a
+    signed token outlived its user and a write hit the foreign key or a
+    read of the user's row found nothing.
+
+    Another process may have deleted the user, so the in-process
+    revoked_users set can't catch every case.
+    """
+    request = context['request']
+    vanished_errors = (IntegrityError, get_user_model().DoesNotExist)
+    if isinstance(exc, vanished_errors) and _user_vanished(request):
+        exc = exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+    response = drf_exception_handler(exc, context)
+    if response is not None and response.status_code == 401:
+        # DRF challenges with the view's first authentication class, but
+        # a user rejected after authenticating should retry with theirs
+        authenticator = getattr(request, 'successful_authenticator', None)
+        if authenticator is not None:
+            response['WWW-Authenticate'] = \
+                authenticator.authenticate_header(request)
+
+    return response
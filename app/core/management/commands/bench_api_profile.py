@@ -0,0 +1,95 @@
+import importlib
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+
+from core.authentication import issue_signed_token
+from recipe.benchmark import best_of, seed_catalog
+
+PROFILES = ('app.settings', 'app.settings_api')
+
+# Run in a fresh interpreter: time to a WSGI app with its URLconf loaded
+STARTUP_SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+print(time.perf_counter() - start, len(sys.modules))
+'''
+
+
+def startup(profile):
+    """Return the seconds and modules it takes to start under profile"""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=profile)
+    output = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT], env=env,
+        cwd=settings.BASE_DIR, stdout=subprocess.PIPE, check=True
+    ).stdout.split()
+
+    return float(output[0]), int(output[1])
+
+
+class Command(BaseCommand):
+    """Django command to compare app.settings with app.settings_api"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        for profile in PROFILES:
+            timings = [startup(profile) for _ in range(repeat)]
+            seconds, modules = min(timings)
+            self.stdout.write(
+                f'{profile} startup: {seconds * 1000:.0f}ms, '
+                f'{modules} modules'
+            )
+
+        # Seeded inside a transaction that is rolled back, see
+        # bench_list_serializers
+        with transaction.atomic():
+            user = seed_catalog(recipes=10)
+            token = issue_signed_token(user)
+            paths = (
+                ('API root', '/api/recipe/', {}),
+                ('tag list', '/api/recipe/tags/',
+                 {'HTTP_AUTHORIZATION': f'Bearer {token}'}),
+            )
+            for label, path, headers in paths:
+                self._bench_requests(label, path, headers, options)
+            transaction.set_rollback(True)
+
+    def _bench_requests(self, label, path, headers, options):
+        """Print the per-request time of GET path under each profile"""
+        count = options['requests']
+        results = []
+        for profile in PROFILES:
+            module = importlib.import_module(profile)
+            overrides = override_settings(
+                MIDDLEWARE=module.MIDDLEWARE,
+                ROOT_URLCONF=module.ROOT_URLCONF,
+                REST_FRAMEWORK=module.REST_FRAMEWORK,
+                ALLOWED_HOSTS=['testserver'],
+            )
+            with overrides:
+                client = Client(**headers)
+                assert client.get(path).status_code == 200
+
+                def run():
+                    for _ in range(count):
+                        client.get(path)
+                results.append(best_of(run, options['repeat']) / count)
+
+        full, api = results
+        self.stdout.write(
+            f'{label}: full {full * 1e6:.0f}us, api {api * 1e6:.0f}us '
+            f'per request ({full / api:.2f}x)'
+        )
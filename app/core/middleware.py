@@ -0,0 +1,135 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import Resolver404, URLResolver, get_resolver, resolve
+
+from core.routers import replica_reads
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Characters ending the fixed start of a path() route or re_path() regex
+ROUTE_SPECIAL = set('<\\.^$*+?{}[]|()')
+
+
+def pin_cache_key(request):
+    """Return the cache key pinning the client of request to the primary,
+    or None for anonymous requests"""
+    credentials = request.META.get('HTTP_AUTHORIZATION') or \
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credentials:
+        return None
+
+    digest = hashlib.sha1(credentials.encode()).hexdigest()
+    return f'replica-pin:{digest}'
+
+
+class ReplicaRoutingMiddleware:
+    """Let safe-method requests read from replicas.
+
+    A client that just sent a write is pinned to the primary for
+    REPLICA_PIN_SECONDS, so it never reads data older than its own write.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REPLICA_DATABASES:
+            return self.get_response(request)
+
+        key = pin_cache_key(request)
+        if request.method in SAFE_METHODS:
+            pinned = key is not None and cache.get(key) is not None
+            with replica_reads(not pinned):
+                return self.get_response(request)
+
+        response = self.get_response(request)
+        if key is not None:
+            cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+
+        return response
+
+
+def bypass_middleware(view):
+    """Mark view to be called by BypassMiddleware, ahead of the rest of
+    the middleware stack"""
+    view.bypass_middleware = True
+    return view
+
+
+def _literal_prefix(pattern):
+    """Return the fixed start of a URL pattern, and whether that is the
+    whole pattern"""
+    route = str(pattern).lstrip('^')
+    for i, char in enumerate(route):
+        if char in ROUTE_SPECIAL:
+            return route[:i], False
+
+    return route, True
+
+
+def bypass_prefixes(patterns, prefix='/'):
+    """Yield the fixed path prefix of every URL pattern whose view is
+    marked with bypass_middleware()"""
+    for pattern in patterns:
+        literal, whole = _literal_prefix(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            if whole:
+                yield from bypass_prefixes(
+                    pattern.url_patterns, prefix + literal
+                )
+            else:
+                yield from (
+                    prefix + literal
+                    for _ in bypass_prefixes(pattern.url_patterns)
+                )
+        elif getattr(pattern.callback, 'bypass_middleware', False):
+            yield prefix + literal
+
+
+class BypassMiddleware:
+    """Call views marked with bypass_middleware() directly.
+
+    Sits right after SecurityMiddleware, so sessions, CSRF, authentication
+    and messages never run for these views; they must not read
+    request.user or request.session. Only safe methods are bypassed and,
+    with replicas configured, their reads go to a replica. Paths outside
+    the fixed prefixes of the marked views, read from the URLconf on
+    first use, are never resolved here.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # URLconf -> path prefixes of its views marked for bypass
+        self.prefixes = {}
+
+    def _prefixes(self, request):
+        """Return the path prefixes of the views of request's URLconf
+        marked with bypass_middleware()"""
+        urlconf = getattr(request, 'urlconf', None) or settings.ROOT_URLCONF
+        if urlconf not in self.prefixes:
+            self.prefixes[urlconf] = tuple(
+                bypass_prefixes(get_resolver(urlconf).url_patterns)
+            )
+
+        return self.prefixes[urlconf]
+
+    def __call__(self, request):
+        if request.method not in SAFE_METHODS or \
+                not request.path_info.startswith(self._prefixes(request)):
+            return self.get_response(request)
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return self.get_response(request)
+        if not getattr(match.func, 'bypass_middleware', False):
+            return self.get_response(request)
+
+        request.resolver_match = match
+        with replica_reads(bool(settings.REPLICA_DATABASES)):
+            response = match.func(request, *match.args, **match.kwargs)
+            # The handler only renders responses of views it called
+            if callable(getattr(response, 'render', None)):
+                response = response.render()
+
+        return response
@@ -0,0 +1,94 @@
+# Generated by Django 2.2.28 on 2026-10-19 10:49
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+# Rows per UPDATE statement when linking tags and ingredients
+BATCH_SIZE = 1000
+
+
+def normalize_name(name):
+    """Same as recipe.catalog.normalize_name, frozen for this migration"""
+    return ' '.join(name.split()).casefold()
+
+
+def link_catalog(apps, schema_editor):
+    """Create one catalog row per normalized name and link every tag and
+    ingredient to it.
+
+    The most used spelling of a name becomes the catalog name. Links are
+    set with batched UPDATE ... FROM (VALUES ...) statements, one per
+    BATCH_SIZE distinct names rather than one per row.
+    """
+    connection = schema_editor.connection
+    for model_name in ('Tag', 'Ingredient'):
+        model = apps.get_model('core', model_name)
+        catalog = apps.get_model('core', f'Catalog{model_name}')
+
+        spellings = {}  # normalized name -> most used spelling
+        variants = []  # (name, normalized name)
+        rows = model.objects.values('name').annotate(
+            uses=Count('id')
+        ).order_by('-uses', 'name').values_list('name', flat=True)
+        for name in rows.iterator():
+            normalized = normalize_name(name)
+            spellings.setdefault(normalized, name)
+            variants.append((name, normalized))
+
+        catalog.objects.bulk_create([
+            catalog(name=name, normalized_name=normalized)
+            for normalized, name in spellings.items()
+        ], batch_size=BATCH_SIZE)
+        ids = dict(catalog.objects.values_list('normalized_name', 'id'))
+
+        table = connection.ops.quote_name(model._meta.db_table)
+        for start in range(0, len(variants), BATCH_SIZE):
+            batch = variants[start:start + BATCH_SIZE]
+            params = []
+            for name, normalized in batch:
+                params += [name, ids[normalized]]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE {table} SET canonical_id = m.canonical_id '
+                    f'FROM (VALUES {", ".join(["(%s, %s)"] * len(batch))}) '
+                    f'AS m (name, canonical_id) WHERE {table}.name = m.name',
+                    params
+                )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_token_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogIngredient',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('normalized_name', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CatalogTag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('normalized_name', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='canonical',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='aliases', to='core.CatalogIngredient'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='canonical',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='aliases', to='core.CatalogTag'),
+        ),
+        migrations.RunPython(link_catalog, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+from django.db import migrations
+
+# Table, through table and its column of each merged model
+MERGED_TABLES = (
+    ('core_tag', 'core_recipe_tags', 'tag_id'),
+    ('core_ingredient', 'core_recipe_ingredients', 'ingredient_id'),
+)
+
+
+def merge_duplicate_rows(cursor, table, through_table, column):
+    """Same as recipe.dedupe.merge_duplicate_rows, frozen for this
+    migration: merge rows sharing (user, lower(name)) into the oldest"""
+    cursor.execute('DROP TABLE IF EXISTS pg_temp.merge_map')
+    cursor.execute(
+        'CREATE TEMP TABLE merge_map AS '
+        'SELECT id AS dup_id, keep_id FROM ('
+        '  SELECT id, min(id) OVER ('
+        '    PARTITION BY user_id, lower(name)) AS keep_id '
+        f'  FROM {table}'
+        ') rows WHERE id <> keep_id'
+    )
+    cursor.execute(
+        f'INSERT INTO {through_table} (recipe_id, {column}) '
+        'SELECT DISTINCT l.recipe_id, m.keep_id '
+        f'FROM {through_table} l JOIN merge_map m ON l.{column} = m.dup_id '
+        'ON CONFLICT DO NOTHING'
+    )
+    cursor.execute(
+        f'DELETE FROM {through_table} l USING merge_map m '
+        f'WHERE l.{column} = m.dup_id'
+    )
+    cursor.execute(
+        f'DELETE FROM {table} t USING merge_map m WHERE t.id = m.dup_id'
+    )
+    cursor.execute(
+        f'UPDATE {table} t SET recipe_count = ('
+        f'  SELECT count(*) FROM {through_table} l '
+        f'  WHERE l.{column} = t.id'
+        ') WHERE t.id IN (SELECT keep_id FROM merge_map)'
+    )
+    cursor.execute('DROP TABLE merge_map')
+
+
+def merge_duplicates(apps, schema_editor):
+    """Merge existing case-insensitive duplicates so the unique indexes
+    below can be built"""
+    with schema_editor.connection.cursor() as cursor:
+        for table, through_table, column in MERGED_TABLES:
+            merge_duplicate_rows(cursor, table, through_table, column)
+        # PostgreSQL won't build an index while the deferred FK checks of
+        # the deletes above are pending
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_catalog'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        # Django 2.2 can't express unique constraints on expressions, the
+        # indexes also serve the lookups of recipe.dedupe._get_by_name
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX IF NOT EXISTS core_tag_user_lower_name_uniq '
+            'ON core_tag (user_id, lower(name))',
+            'DROP INDEX IF EXISTS core_tag_user_lower_name_uniq',
+        ),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX IF NOT EXISTS '
+            'core_ingredient_user_lower_name_uniq '
+            'ON core_ingredient (user_id, lower(name))',
+            'DROP INDEX IF EXISTS core_ingredient_user_lower_name_uniq',
+        ),
+    ]
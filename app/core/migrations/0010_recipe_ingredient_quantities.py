@@ -0,0 +1,81 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+# (name, base unit, base units per unit)
+UNITS = [
+    ('g', 'g', 1), ('gram', 'g', 1), ('grams', 'g', 1),
+    ('kg', 'g', 1000), ('kilogram', 'g', 1000), ('kilograms', 'g', 1000),
+    ('oz', 'g', '28.3495'), ('ounce', 'g', '28.3495'),
+    ('ounces', 'g', '28.3495'),
+    ('lb', 'g', '453.5924'), ('pound', 'g', '453.5924'),
+    ('pounds', 'g', '453.5924'),
+    ('ml', 'ml', 1), ('milliliter', 'ml', 1), ('milliliters', 'ml', 1),
+    ('l', 'ml', 1000), ('liter', 'ml', 1000), ('liters', 'ml', 1000),
+    ('tsp', 'ml', 5), ('teaspoon', 'ml', 5), ('teaspoons', 'ml', 5),
+    ('tbsp', 'ml', 15), ('tablespoon', 'ml', 15),
+    ('tablespoons', 'ml', 15),
+    ('cup', 'ml', 240), ('cups', 'ml', 240),
+    ('piece', 'piece', 1), ('pieces', 'piece', 1),
+]
+
+
+def create_units(apps, schema_editor):
+    """Fill the unit normalization table"""
+    Unit = apps.get_model('core', 'Unit')
+    Unit.objects.bulk_create([
+        Unit(name=name, base=base, factor=factor)
+        for name, base, factor in UNITS
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_unique_names'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Unit',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32, unique=True)),
+                ('base', models.CharField(max_length=16)),
+                ('factor', models.DecimalField(decimal_places=4, max_digits=12)),
+            ],
+        ),
+        migrations.RunPython(create_units, migrations.RunPython.noop),
+        # Take over the table of the implicit through model as is, only
+        # Django's view of it changes
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='RecipeIngredient',
+                    fields=[
+                        ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Recipe')),
+                        ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Ingredient')),
+                    ],
+                    options={
+                        'db_table': 'core_recipe_ingredients',
+                        'unique_together': {('recipe', 'ingredient')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='recipe',
+                    name='ingredients',
+                    field=models.ManyToManyField(through='core.RecipeIngredient', to='core.Ingredient'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='recipeingredient',
+            name='quantity',
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='recipeingredient',
+            name='unit',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='core.Unit'),
+        ),
+    ]
@@ -49,6 +49,24 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+class CatalogTag(models.Model):
+    """Canonical tag shared by all users, one per normalized name"""
+    name = models.CharField(max_length=255)
+    normalized_name = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class CatalogIngredient(models.Model):
+    """Canonical ingredient shared by all users, one per normalized name"""
+    name = models.CharField(max_length=255)
+    normalized_name = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
 class Tag(models.Model):
     """Tag to be used for a recipe"""
     name = models.CharField(max_length=255)
@@ -56,6 +74,21 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    # The shared catalog entry this tag is the user's alias of, set by
+    # recipe/signals.py; name keeps the user's own spelling
+    canonical = models.ForeignKey(
+        'CatalogTag',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='aliases',
+    )
+    # Number of recipes using this tag, kept up to date by
+    # recipe/signals.py and repairable with `manage.py repair_recipe_counts`
+    recipe_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['user', '-recipe_count'])]
 
     def __str__(self):
         return self.name
@@ -68,6 +101,20 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    # The shared catalog entry this ingredient is the user's alias of
+    canonical = models.ForeignKey(
+        'CatalogIngredient',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='aliases',
+    )
+    # Number of recipes using this ingredient, kept up to date by
+    # recipe/signals.py and repairable with `manage.py repair_recipe_counts`
+    recipe_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['user', '-recipe_count'])]
 
     def __str__(self):
         return self.name
@@ -86,9 +133,51 @@ class Recipe(models.Model):
     # link field set to optional blank=True
     # always set to blank instead of explicitly setting to null
     # blank=True will set field to an empty string instead
-    ingredients = models.ManyToManyField('Ingredient')
+    # Quantities are stored on the through model, see RecipeIngredient
+    ingredients = models.ManyToManyField(
+        'Ingredient', through='RecipeIngredient'
+    )
     tags = models.ManyToManyField('Tag')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    # Shared recipes can be read by anyone, see recipe.views.PublicRecipeView
+    is_public = models.BooleanField(default=False)
+
+    class Meta:
+        # Range filters and orderings within a user's recipes, id keeps
+        # the index order total for cursor pagination
+        indexes = [
+            models.Index(fields=['user', 'time_minutes', 'id']),
+            models.Index(fields=['user', 'price', 'id']),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class Unit(models.Model):
+    """A unit spelling and how to convert it to the base unit quantities
+    are added up in (g, ml or piece)"""
+    name = models.CharField(max_length=32, unique=True)
+    base = models.CharField(max_length=16)
+    # Number of base units in one of this unit
+    factor = models.DecimalField(max_digits=12, decimal_places=4)
+
+    def __str__(self):
+        return self.name
+
+
+class RecipeIngredient(models.Model):
+    """How much of an ingredient a recipe uses"""
+    recipe = models.ForeignKey('Recipe', on_delete=models.CASCADE)
+    ingredient = models.ForeignKey('Ingredient', on_delete=models.CASCADE)
+    quantity = models.DecimalField(
+        max_digits=10, decimal_places=3, null=True, blank=True
+    )
+    unit = models.ForeignKey(
+        'Unit', null=True, blank=True, on_delete=models.PROTECT
+    )
+
+    class Meta:
+        # The table Django created for the plain ManyToManyField
+        db_table = 'core_recipe_ingredients'
+        unique_together = (('recipe', 'ingredient'),)
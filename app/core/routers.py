@@ -0,0 +1,52 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Apps always read from the primary. Tokens are looked up right after
+# they are issued, and a replica that lags would reject them.
+PRIMARY_APP_LABELS = {'authtoken'}
+
+_state = threading.local()
+
+
+@contextmanager
+def replica_reads(allowed=True):
+    """Allow (or forbid) reads from replicas within the block"""
+    previous = getattr(_state, 'allowed', False)
+    _state.allowed = allowed
+    try:
+        yield
+    finally:
+        _state.allowed = previous
+
+
+class ReplicaRouter:
+    """Send reads to a random replica while replica_reads() allows it.
+
+    Everything else, writes and reads outside replica_reads() included,
+    uses the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not getattr(_state, 'allowed', False) or \
+                not settings.REPLICA_DATABASES:
+            return None
+        if model._meta.app_label in PRIMARY_APP_LABELS:
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Related objects come from wherever the instance did
+            return None
+
+        return random.choice(settings.REPLICA_DATABASES)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
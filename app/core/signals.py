@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.authentication import revoked_users
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def track_inactive_user(sender, instance, **kwargs):
+    """Reject signed tokens of deactivated users, accept them again once
+    the user is reactivated"""
+    if instance.is_active:
+        revoked_users.discard(instance.pk)
+    else:
+        revoked_users.add(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def track_deleted_user(sender, instance, **kwargs):
+    """Reject signed tokens of deleted users"""
+    revoked_users.add(instance.pk)
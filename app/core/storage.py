@@ -0,0 +1,67 @@
+import threading
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.utils.deconstruct import deconstructible
+from django.utils.encoding import filepath_to_uri
+
+
+@deconstructible
+class InMemoryStorage(Storage):
+    """Storage keeping files in a dict of the current process.
+
+    Used by the test settings, so uploads never touch MEDIA_ROOT and
+    parallel test processes can't trip over each other's files.
+    """
+
+    def __init__(self, base_url=None):
+        self.base_url = base_url
+        self._files = {}  # name -> bytes
+        self._lock = threading.Lock()
+
+    def _open(self, name, mode='rb'):
+        try:
+            return ContentFile(self._files[name], name=name)
+        except KeyError:
+            raise FileNotFoundError(name)
+
+    def _save(self, name, content):
+        data = b''.join(content.chunks())
+        with self._lock:
+            name = self.get_available_name(name)
+            self._files[name] = data
+
+        return name
+
+    def delete(self, name):
+        with self._lock:
+            self._files.pop(name, None)
+
+    def exists(self, name):
+        return name in self._files
+
+    def size(self, name):
+        try:
+            return len(self._files[name])
+        except KeyError:
+            raise FileNotFoundError(name)
+
+    def listdir(self, path):
+        prefix = path.rstrip('/') + '/' if path else ''
+        directories, files = set(), []
+        for name in self._files:
+            if not name.startswith(prefix):
+                continue
+            head, sep, tail = name[len(prefix):].partition('/')
+            if sep:
+                directories.add(head)
+            else:
+                files.append(head)
+
+        return sorted(directories), sorted(files)
+
+    def url(self, name):
+        base_url = self.base_url or settings.MEDIA_URL
+        return urljoin(base_url, filepath_to_uri(name))
@@ -0,0 +1,42 @@
+"""Factories shared by the test modules of every app.
+
+Call them from setUpTestData where possible: the rows are then created
+once per TestCase class instead of once per test, and rolled back after
+the class like everything else.
+"""
+from django.contrib.auth import get_user_model
+
+from core.models import Tag, Ingredient, Recipe
+
+
+def create_user(email='raymond@test.com', password='test123', **params):
+    """Create and return a user"""
+    return get_user_model().objects.create_user(email, password, **params)
+
+
+def sample_tag(user, name='Main Course'):
+    """Create and return a sample tag"""
+    return Tag.objects.create(user=user, name=name)
+
+
+def sample_ingredient(user, name='Cinnamon'):
+    """Create and return a sample ingredient"""
+    return Ingredient.objects.create(user=user, name=name)
+
+
+def sample_recipe(user, tags=(), ingredients=(), **params):
+    """Create and return a sample recipe linked to tags and ingredients"""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    recipe = Recipe.objects.create(user=user, **defaults)
+    if tags:
+        recipe.tags.add(*tags)
+    if ingredients:
+        recipe.ingredients.add(*ingredients)
+
+    return recipe
@@ -0,0 +1,92 @@
+import datetime
+import io
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core import renderers
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+
+SAMPLE = {
+    'id': 1,
+    'title': 'Crème brûlée  ',
+    'price': Decimal('5.50'),
+    'created': datetime.datetime(
+        2019, 11, 2, 10, 30, 15, 123456, tzinfo=datetime.timezone.utc
+    ),
+    'day': datetime.date(2019, 11, 2),
+    'message': _('This field is required.'),
+    'errors': {0: ['bad']},
+    'tags': [1, 2, 3],
+    'link': '',
+    'image': None,
+    'ratio': 0.1,
+}
+
+
+class RendererTests(TestCase):
+
+    def test_render_matches_stdlib(self):
+        """Test the fast renderer produces the same bytes as JSONRenderer"""
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE),
+            JSONRenderer().render(SAMPLE)
+        )
+
+    def test_render_indent_falls_back(self):
+        """Test indented output is still rendered by the stdlib"""
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE, media_type),
+            JSONRenderer().render(SAMPLE, media_type)
+        )
+
+    def test_render_big_int_falls_back(self):
+        """Test integers orjson can't represent are still rendered"""
+        data = {'id': 2 ** 70}
+        self.assertEqual(
+            FastJSONRenderer().render(data),
+            JSONRenderer().render(data)
+        )
+
+    def test_render_without_orjson(self):
+        """Test the renderer works when orjson isn't installed"""
+        with patch.object(renderers, 'orjson', None):
+            self.assertEqual(
+                FastJSONRenderer().render(SAMPLE),
+                JSONRenderer().render(SAMPLE)
+            )
+
+    def test_render_none(self):
+        """Test None renders to an empty body"""
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class ParserTests(TestCase):
+
+    def test_parse_matches_stdlib(self):
+        """Test the fast parser returns the same data as JSONParser"""
+        body = '{"title": "Crème brûlée", "tags": [1, 2], "price": 5.5}'
+
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(body.encode('utf-8'))),
+            JSONParser().parse(io.BytesIO(body.encode('utf-8')))
+        )
+
+    def test_parse_invalid(self):
+        """Test invalid JSON raises a ParseError"""
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"title": '))
+
+    def test_parse_nan_rejected(self):
+        """Test non-standard constants are rejected like the stdlib"""
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"price": NaN}'))
@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.routers import ReplicaRouter, replica_reads
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRoutingTests(TestCase):
+    """Test safe-method requests read from the replica"""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'raymond@test.com',
+            'test123'
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def get_recipes(self):
+        """GET the recipe list, returning the queries run on the replica"""
+        with CaptureQueriesContext(connections['replica']) as queries:
+            self.client.get(RECIPES_URL)
+        return queries
+
+    def test_safe_request_uses_replica(self):
+        """Test the recipe list is read from the replica"""
+        queries = self.get_recipes()
+
+        self.assertEqual(len(queries), 1)
+        self.assertIn('core_recipe', queries[0]['sql'])
+
+    def test_pinned_after_write(self):
+        """Test a client reads from the primary right after a write"""
+        self.client.post(RECIPES_URL, {
+            'title': 'Toast', 'time_minutes': 5, 'price': 1.00
+        })
+
+        self.assertEqual(len(self.get_recipes()), 0)
+
+        # Other clients are not pinned
+        self.client.force_authenticate(self.user)
+        self.client.credentials()
+        self.assertEqual(len(self.get_recipes()), 1)
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_expires(self):
+        """Test reads go back to the replica after the pin expires"""
+        self.client.post(RECIPES_URL, {
+            'title': 'Toast', 'time_minutes': 5, 'price': 1.00
+        })
+
+        self.assertEqual(len(self.get_recipes()), 1)
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_no_replicas(self):
+        """Test everything uses the primary without replicas"""
+        self.assertEqual(len(self.get_recipes()), 0)
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRouterTests(TestCase):
+    """Test the router's decisions"""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_outside_requests(self):
+        """Test reads use the primary unless replica_reads() allows it"""
+        self.assertIsNone(self.router.db_for_read(Recipe))
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Recipe), 'replica')
+            self.assertIsNone(self.router.db_for_read(Token))
+
+    def test_no_migrations_on_replicas(self):
+        """Test migrations never run against a replica"""
+        self.assertFalse(self.router.allow_migrate('replica', 'core'))
+        self.assertIsNone(self.router.allow_migrate('default', 'core'))
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app import settings_api
+
+
+@override_settings(
+    MIDDLEWARE=settings_api.MIDDLEWARE,
+    ROOT_URLCONF=settings_api.ROOT_URLCONF,
+)
+class ApiProfileTests(TestCase):
+    """Test the API works with the trimmed app.settings_api stack"""
+
+    @classmethod
+    def setUpTestData(cls):
+        get_user_model().objects.create_user('raymond@test.com', 'test123')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_browser_apps_removed(self):
+        """Test the profile drops the admin, sessions and messages"""
+        for app in settings_api.BROWSER_APPS:
+            self.assertNotIn(app, settings_api.INSTALLED_APPS)
+        for middleware in settings_api.MIDDLEWARE:
+            self.assertNotIn('sessions', middleware)
+            self.assertNotIn('messages', middleware)
+
+    def test_token_round_trip(self):
+        """Test logging in and using the token without sessions"""
+        res = self.client.post(
+            reverse('user:token'),
+            {'email': 'raymond@test.com', 'password': 'test123'}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.cookies)
+
+        token = res.data['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        res = self.client.get(reverse('recipe:recipe-list'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Cookie', res.get('Vary', ''))
+
+    def test_no_admin(self):
+        """Test the admin isn't routed"""
+        res = self.client.get('/admin/')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
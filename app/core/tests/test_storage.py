@@ -0,0 +1,41 @@
+from django.core.files.base import ContentFile
+from django.test import TestCase
+
+from core.storage import InMemoryStorage
+
+
+class InMemoryStorageTests(TestCase):
+    """Test the storage used for uploads in tests"""
+
+    def setUp(self):
+        self.storage = InMemoryStorage(base_url='/media/')
+
+    def test_save_and_open(self):
+        """Test saved files can be read back, listed and deleted"""
+        name = self.storage.save('uploads/a.txt', ContentFile(b'hello'))
+
+        self.assertEqual(name, 'uploads/a.txt')
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.storage.size(name), 5)
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b'hello')
+        self.assertEqual(self.storage.listdir(''), (['uploads'], []))
+        self.assertEqual(self.storage.listdir('uploads'), ([], ['a.txt']))
+        self.assertEqual(self.storage.url(name), '/media/uploads/a.txt')
+
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+
+    def test_name_collision(self):
+        """Test saving an existing name picks a new one"""
+        first = self.storage.save('a.txt', ContentFile(b'1'))
+        second = self.storage.save('a.txt', ContentFile(b'2'))
+
+        self.assertNotEqual(first, second)
+        with self.storage.open(first) as f:
+            self.assertEqual(f.read(), b'1')
+
+    def test_missing_file(self):
+        """Test opening a missing file raises FileNotFoundError"""
+        with self.assertRaises(FileNotFoundError):
+            self.storage.open('missing.txt')
@@ -0,0 +1,65 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+
+from core.models import Tag, Ingredient, Recipe
+
+
+def seed_catalog(recipes=1000, tags=50, ingredients=200, per_recipe=5,
+                 email='benchmark@test.com'):
+    """Create a user with a synthetic catalog and return the user"""
+    user = get_user_model().objects.create_user(email, 'benchmark')
+    rng = random.Random(0)  # fixed seed so runs are comparable
+
+    tag_objs = Tag.objects.bulk_create(
+        Tag(user=user, name=f'Tag {i}') for i in range(tags)
+    )
+    ingredient_objs = Ingredient.objects.bulk_create(
+        Ingredient(user=user, name=f'Ingredient {i}')
+        for i in range(ingredients)
+    )
+    recipe_objs = Recipe.objects.bulk_create(
+        Recipe(
+            user=user,
+            title=f'Recipe {i}',
+            time_minutes=rng.randint(5, 120),
+            price=f'{rng.uniform(1, 50):.2f}',
+            link=f'https://example.com/{i}',
+        )
+        for i in range(recipes)
+    )
+
+    if recipe_objs and recipe_objs[0].id is None:
+        # Backends without RETURNING don't set pks on bulk_create
+        recipe_objs = list(Recipe.objects.filter(user=user))
+        tag_objs = list(Tag.objects.filter(user=user))
+        ingredient_objs = list(Ingredient.objects.filter(user=user))
+
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for recipe in recipe_objs
+        for tag in rng.sample(tag_objs, min(per_recipe, tags))
+    )
+    Recipe.ingredients.through.objects.bulk_create(
+        Recipe.ingredients.through(
+            recipe_id=recipe.id, ingredient_id=ingredient.id
+        )
+        for recipe in recipe_objs
+        for ingredient in rng.sample(
+            ingredient_objs, min(per_recipe, ingredients)
+        )
+    )
+
+    return user
+
+
+def best_of(func, repeat=5):
+    """Run func repeat times and return the fastest wall time in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
@@ -0,0 +1,62 @@
+import hashlib
+
+from django.core.cache import caches
+
+from core.models import Tag, Ingredient, CatalogTag, CatalogIngredient
+
+# Catalog ids never change, so lookups can stay cached for a long time
+CATALOG_ID_TIMEOUT = 24 * 60 * 60
+# New catalog names show up in search results after at most this long
+CATALOG_SEARCH_TIMEOUT = 10 * 60
+CATALOG_SEARCH_LIMIT = 20
+
+# Per-user model -> shared catalog model
+CATALOGS = {Tag: CatalogTag, Ingredient: CatalogIngredient}
+
+
+def normalize_name(name):
+    """Return the form of name used to match catalog entries"""
+    return ' '.join(name.split()).casefold()
+
+
+def _cache_key(prefix, model, value):
+    digest = hashlib.sha1(value.encode()).hexdigest()
+    return f'{prefix}:{model._meta.model_name}:{digest}'
+
+
+def canonical_id(model, name):
+    """Return the id of the catalog entry for a tag or ingredient name,
+    creating the entry the first time the name is seen"""
+    catalog = CATALOGS[model]
+    normalized = normalize_name(name)
+    key = _cache_key('catalog-id', model, normalized)
+    pk = caches['catalog'].get(key)
+    if pk is None:
+        # get_or_create() recovers from a concurrent insert of the same
+        # name through the unique normalized_name
+        pk = catalog.objects.get_or_create(
+            normalized_name=normalized,
+            defaults={'name': ' '.join(name.split())}
+        )[0].pk
+        caches['catalog'].set(key, pk, CATALOG_ID_TIMEOUT)
+
+    return pk
+
+
+def search_catalog(model, prefix):
+    """Return catalog entries whose name starts with prefix, cached per
+    prefix since every user searches the same table"""
+    normalized = normalize_name(prefix)
+    key = _cache_key('catalog-search', model, normalized)
+    entries = caches['catalog'].get(key)
+    if entries is None:
+        entries = list(
+            CATALOGS[model].objects.filter(
+                normalized_name__startswith=normalized
+            ).order_by('normalized_name').values(
+                'id', 'name'
+            )[:CATALOG_SEARCH_LIMIT]
+        )
+        caches['catalog'].set(key, entries, CATALOG_SEARCH_TIMEOUT)
+
+    return entries
@@ -0,0 +1,40 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import Tag, Ingredient, Recipe
+
+
+# Model whose recipe_count is maintained -> Recipe M2M field linking it
+COUNTED_FIELDS = {Tag: 'tags', Ingredient: 'ingredients'}
+
+
+def adjust_counts(model, ids, delta):
+    """Add delta to recipe_count of the given tags or ingredients.
+
+    ids may also be a values_list() queryset, which then runs as a
+    subquery of the UPDATE instead of a separate query.
+    """
+    if delta:
+        model.objects.filter(pk__in=ids).update(
+            recipe_count=F('recipe_count') + delta
+        )
+
+
+def _actual_count(model):
+    """Return an expression counting the recipes linked to each row"""
+    through = getattr(Recipe, COUNTED_FIELDS[model]).through
+    column = f'{model._meta.model_name}_id'  # tag -> tag_id
+    counts = through.objects.filter(
+        **{column: OuterRef('pk')}
+    ).order_by().values(column).annotate(count=Count('*')).values('count')
+
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def repair_counts(model):
+    """Recompute recipe_count from the through table in one UPDATE,
+    returning the number of rows that had drifted"""
+    actual = _actual_count(model)
+    return model.objects.exclude(recipe_count=actual).update(
+        recipe_count=actual
+    )
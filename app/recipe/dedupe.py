@@ -0,0 +1,135 @@
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Value
+from django.db.models.functions import Lower
+
+from core.models import Recipe
+from recipe.catalog import canonical_id
+from recipe.counters import COUNTED_FIELDS
+from recipe.stats import invalidate_stats
+
+
+def merge_duplicate_rows(cursor, table, through_table, column,
+                         extra_columns=()):
+    """Merge tags or ingredients sharing (user, lower(name)) into the
+    oldest of them, with set-based statements only.
+
+    Links of the duplicates are moved to the survivor (links it already
+    had are skipped), then the duplicates are deleted and the survivors'
+    recipe_count recomputed. extra_columns of the through table, such as
+    quantities, move with the links. Returns the number of rows merged
+    away and the ids of the users owning them.
+    """
+    qn = cursor.db.ops.quote_name
+    table, through_table, column = (
+        qn(table), qn(through_table), qn(column)
+    )
+    extra = ''.join(f', {qn(name)}' for name in extra_columns)
+    extra_values = ''.join(f', l.{qn(name)}' for name in extra_columns)
+
+    cursor.execute('DROP TABLE IF EXISTS pg_temp.merge_map')
+    cursor.execute(
+        'CREATE TEMP TABLE merge_map AS '
+        'SELECT id AS dup_id, keep_id, user_id FROM ('
+        '  SELECT id, user_id, min(id) OVER ('
+        '    PARTITION BY user_id, lower(name)) AS keep_id '
+        f'  FROM {table}'
+        ') rows WHERE id <> keep_id'
+    )
+    cursor.execute(
+        f'INSERT INTO {through_table} (recipe_id, {column}{extra}) '
+        f'SELECT DISTINCT l.recipe_id, m.keep_id{extra_values} '
+        f'FROM {through_table} l JOIN merge_map m ON l.{column} = m.dup_id '
+        'ON CONFLICT DO NOTHING'
+    )
+    cursor.execute(
+        f'DELETE FROM {through_table} l USING merge_map m '
+        f'WHERE l.{column} = m.dup_id'
+    )
+    cursor.execute(
+        f'DELETE FROM {table} t USING merge_map m WHERE t.id = m.dup_id'
+    )
+    cursor.execute(
+        f'UPDATE {table} t SET recipe_count = ('
+        f'  SELECT count(*) FROM {through_table} l '
+        f'  WHERE l.{column} = t.id'
+        ') WHERE t.id IN (SELECT keep_id FROM merge_map)'
+    )
+    cursor.execute(
+        "SELECT count(*), COALESCE(array_agg(DISTINCT user_id), '{}') "
+        'FROM merge_map'
+    )
+    merged, user_ids = cursor.fetchone()
+    cursor.execute('DROP TABLE merge_map')
+
+    return merged, user_ids
+
+
+def merge_duplicates(model):
+    """Merge a model's case-insensitive duplicate names, returning the
+    number of rows merged away"""
+    through = getattr(Recipe, COUNTED_FIELDS[model]).through
+    with transaction.atomic(), \
+            connections[model.objects.db].cursor() as cursor:
+        column = f'{model._meta.model_name}_id'
+        merged, user_ids = merge_duplicate_rows(
+            cursor,
+            model._meta.db_table,
+            through._meta.db_table,
+            column,
+            [field.column for field in through._meta.concrete_fields
+             if not field.primary_key
+             and field.column not in ('recipe_id', column)]
+        )
+    invalidate_stats(*user_ids)
+
+    return merged
+
+
+def _get_by_name(model, user, name):
+    """Return user's row whose name matches name ignoring case, with the
+    same lower() the unique index uses"""
+    return model.objects.annotate(lower_name=Lower('name')).get(
+        user=user, lower_name=Lower(Value(name))
+    )
+
+
+def get_or_create_named(model, user, name):
+    """Return (tag or ingredient, created) for user's name, ignoring
+    case, without ever creating a duplicate.
+
+    On PostgreSQL this is one INSERT ... ON CONFLICT DO NOTHING against
+    the unique (user, lower(name)) index, followed by a lookup only if
+    the name already existed. The raw INSERT sends no signals, so the
+    catalog link and the stats invalidation happen here.
+    """
+    connection = connections[model.objects.db]
+    if connection.vendor != 'postgresql':
+        try:
+            with transaction.atomic(using=connection.alias):
+                return model.objects.create(user=user, name=name), True
+        except IntegrityError:
+            return _get_by_name(model, user, name), False
+
+    canonical = canonical_id(model, name)
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {qn(model._meta.db_table)} '
+            '(user_id, name, recipe_count, canonical_id) '
+            'VALUES (%s, %s, 0, %s) '
+            'ON CONFLICT (user_id, lower(name)) DO NOTHING RETURNING id',
+            [user.pk, name, canonical]
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return _get_by_name(model, user, name), False
+
+    invalidate_stats(user.pk)
+    instance = model(
+        id=row[0], user=user, name=name, recipe_count=0,
+        canonical_id=canonical
+    )
+    instance._state.adding = False
+    instance._state.db = connection.alias
+
+    return instance, True
@@ -0,0 +1,61 @@
+from django.db import connections, transaction
+from django.db.models.fields.files import FieldFile
+
+from core.models import Recipe
+from recipe.counters import COUNTED_FIELDS, adjust_counts
+from recipe.stats import invalidate_stats
+
+
+def _copy_values(recipe):
+    """Return the column values of recipe, without its primary key.
+    Copies are private until their owner shares them."""
+    values = {}
+    for field in Recipe._meta.concrete_fields:
+        if field.primary_key:
+            continue
+        value = getattr(recipe, field.attname)
+        if isinstance(value, FieldFile):
+            # Copies point at the same stored file instead of copying it
+            value = value.name
+        values[field.attname] = value
+    values['is_public'] = False
+
+    return values
+
+
+def duplicate_recipe(recipe, copies=1):
+    """Create copies of recipe linked to the same tags and ingredients.
+
+    The recipes and the links of each M2M relation are inserted with one
+    bulk_create each, in a single transaction. bulk_create sends no
+    signals, so recipe counts and stats are updated here. Returns the new
+    recipes.
+    """
+    values = _copy_values(recipe)
+    with transaction.atomic():
+        new_recipes = [Recipe(**values) for _ in range(copies)]
+        if connections[Recipe.objects.db].features \
+                .can_return_ids_from_bulk_insert:
+            Recipe.objects.bulk_create(new_recipes)
+        else:
+            # The copies need their pks to be linked below
+            for new_recipe in new_recipes:
+                new_recipe.save(force_insert=True)
+
+        for model, field_name in COUNTED_FIELDS.items():
+            through = getattr(Recipe, field_name).through
+            column = f'{model._meta.model_name}_id'  # tag -> tag_id
+            # Everything but the recipe, quantities and units included
+            links = list(through.objects.filter(recipe_id=recipe.pk).values(
+                *[field.attname for field in through._meta.concrete_fields
+                  if not field.primary_key and field.attname != 'recipe_id']
+            ))
+            through.objects.bulk_create([
+                through(recipe_id=new_recipe.pk, **link)
+                for new_recipe in new_recipes
+                for link in links
+            ])
+            adjust_counts(model, [link[column] for link in links], copies)
+
+    invalidate_stats(recipe.user_id)
+    return new_recipes
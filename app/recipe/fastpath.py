@@ -0,0 +1,169 @@
+from collections import defaultdict
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from django.db.models.fields.files import FieldFile
+
+from core.models import Recipe
+from recipe import serializers
+
+
+# Fields RecipeSerializer can render, in serializer field order
+RECIPE_FIELDS = serializers.RecipeSerializer.Meta.fields
+DEFAULT_FIELDS = serializers.RecipeSerializer.Meta.default_fields
+RELATIONS = ('ingredients', 'tags')
+
+
+def _is_postgresql(queryset):
+    """Return True if queryset will run against PostgreSQL"""
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def _related_ids(queryset, field_name, recipe_ids):
+    """Return a dict of recipe id -> sorted list of related ids"""
+    through = getattr(Recipe, field_name).through
+    target_column = f'{field_name[:-1]}_id'  # tags -> tag_id
+    links = through.objects.using(queryset.db).filter(
+        recipe_id__in=recipe_ids
+    )
+
+    if _is_postgresql(queryset):
+        # One row per recipe, the ids come back already aggregated
+        rows = links.values('recipe_id').annotate(
+            ids=ArrayAgg(target_column, ordering=target_column)
+        ).values_list('recipe_id', 'ids')
+        return dict(rows)
+
+    related = defaultdict(list)
+    rows = links.order_by('recipe_id', target_column).values_list(
+        'recipe_id', target_column
+    )
+    for recipe_id, related_id in rows:
+        related[recipe_id].append(related_id)
+
+    return related
+
+
+def _related_objects(queryset, field_name, recipe_ids):
+    """Return a dict of recipe id -> id/name dicts of related objects"""
+    through = getattr(Recipe, field_name).through
+    target = field_name[:-1]  # tags -> tag
+    rows = through.objects.using(queryset.db).filter(
+        recipe_id__in=recipe_ids
+    ).order_by('recipe_id', f'{target}_id').values_list(
+        'recipe_id', f'{target}__id', f'{target}__name'
+    )
+
+    related = defaultdict(list)
+    for recipe_id, related_id, name in rows:
+        related[recipe_id].append({'id': related_id, 'name': name})
+
+    return related
+
+
+def _json_objects_sql(field_name):
+    """Return a correlated subquery aggregating a recipe's related
+    objects into a JSON array of id/name objects (PostgreSQL only)"""
+    field = Recipe._meta.get_field(field_name)
+    through = field.remote_field.through._meta.db_table
+    target = field.related_model._meta.db_table
+
+    return (
+        "SELECT COALESCE(json_agg(json_build_object("
+        "'id', t.id, 'name', t.name) ORDER BY t.id), '[]') "
+        f"FROM {target} t JOIN {through} l "
+        f"ON l.{field.m2m_reverse_name()} = t.id "
+        f"WHERE l.{field.m2m_column_name()} = {Recipe._meta.db_table}.id"
+    )
+
+
+def _formatting_fields(context):
+    """Return the serializer fields used to format price and image.
+
+    Reusing the serializer's own fields means formatting (rounding,
+    COERCE_DECIMAL_TO_STRING, absolute media URLs) can never drift from
+    the slow path.
+    """
+    serializer = serializers.RecipeSerializer(
+        fields=RECIPE_FIELDS, context=context or {}
+    )
+    return serializer.fields['price'], serializer.fields['image']
+
+
+def serialize_names(queryset, fields=('id', 'name')):
+    """Serialize tags or ingredients without the DRF field machinery"""
+    return list(queryset.values(*fields))
+
+
+def serialize_recipes(queryset, fields=None, expand=(), context=None):
+    """Serialize recipes the same way RecipeSerializer does, but from
+    values() rows and aggregated arrays instead of model instances.
+
+    fields and expand have the same meaning as for RecipeSerializer; only
+    the columns and relations they need are queried. On PostgreSQL
+    expanded relations are built by json_agg subqueries of the main
+    query, other relations cost one grouped query each.
+    """
+    fields = [
+        name for name in RECIPE_FIELDS
+        if name in (fields or DEFAULT_FIELDS)
+    ]
+    relations = [name for name in RELATIONS if name in fields]
+    nested = [name for name in relations if name in expand]
+    columns = {'id'}.union(name for name in fields if name not in RELATIONS)
+
+    aggregated = []
+    if nested and _is_postgresql(queryset):
+        queryset = queryset.annotate(**{
+            f'{name}_objects': RawSQL(_json_objects_sql(name), ())
+            for name in nested
+        })
+        aggregated = nested
+        columns.update(f'{name}_objects' for name in nested)
+
+    rows = list(queryset.values(*columns))
+    if not rows:
+        return []
+
+    recipe_ids = {row['id'] for row in rows}
+    related = {
+        name: (
+            _related_objects(queryset, name, recipe_ids)
+            if name in nested else
+            _related_ids(queryset, name, recipe_ids)
+        )
+        for name in relations if name not in aggregated
+    }
+    price, image = _formatting_fields(context)
+    image_field = Recipe._meta.get_field('image')
+
+    data = []
+    for row in rows:
+        recipe = {}
+        for name in fields:
+            if name in aggregated:
+                recipe[name] = row[f'{name}_objects']
+            elif name in related:
+                recipe[name] = related[name].get(row['id'], [])
+            elif name == 'price':
+                recipe[name] = price.to_representation(row[name])
+            elif name == 'image':
+                recipe[name] = image.to_representation(
+                    FieldFile(None, image_field, row[name])
+                )
+            else:
+                recipe[name] = row[name]
+        data.append(recipe)
+
+    return data
+
+
+def serialize_recipe_details(queryset, fields=None, context=None):
+    """Serialize recipes the same way RecipeDetailSerializer does.
+
+    On PostgreSQL the nested tags and ingredients are built by json_agg
+    subqueries, so the whole response is a single query. Other backends
+    fetch them with one values() query per relation instead.
+    """
+    return serialize_recipes(queryset, fields, RELATIONS, context)
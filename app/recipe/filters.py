@@ -0,0 +1,18 @@
+from rest_framework.filters import OrderingFilter
+
+
+class StableOrderingFilter(OrderingFilter):
+    """OrderingFilter that breaks ties on the primary key.
+
+    The id follows the direction of the last ordering term, so the
+    (user, column, id) indexes can serve the whole ORDER BY and cursor
+    pagination never skips or repeats rows with equal values.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and ordering[-1].lstrip('-') not in ('id', 'pk'):
+            last = ordering[-1]
+            ordering = [*ordering, '-id' if last.startswith('-') else 'id']
+
+        return ordering
@@ -0,0 +1,47 @@
+import io
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Recipe
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+from recipe.benchmark import seed_catalog, best_of
+from recipe.serializers import RecipeDetailSerializer
+
+
+class Command(BaseCommand):
+    """Django command to compare JSON renderers on a large recipe list"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = seed_catalog(recipes=options['recipes'])
+            recipes = Recipe.objects.filter(user=user) \
+                .prefetch_related('tags', 'ingredients')
+            data = RecipeDetailSerializer(recipes, many=True).data
+            transaction.set_rollback(True)
+
+        body = JSONRenderer().render(data)
+        repeat = options['repeat']
+        rows = [
+            ('render', lambda: JSONRenderer().render(data),
+             lambda: FastJSONRenderer().render(data)),
+            ('parse', lambda: JSONParser().parse(io.BytesIO(body)),
+             lambda: FastJSONParser().parse(io.BytesIO(body))),
+        ]
+        self.stdout.write(f'{len(body) / 1024:.0f}KiB payload')
+        for label, slow, fast in rows:
+            slow_time = best_of(slow, repeat)
+            fast_time = best_of(fast, repeat)
+            self.stdout.write(
+                f'{label}: stdlib {slow_time * 1000:.1f}ms, '
+                f'orjson {fast_time * 1000:.1f}ms '
+                f'({slow_time / fast_time:.1f}x)'
+            )
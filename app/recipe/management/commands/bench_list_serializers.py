@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Tag, Recipe
+from recipe import fastpath
+from recipe.benchmark import seed_catalog, best_of
+from recipe.serializers import RecipeSerializer, TagSerializer
+
+
+class Command(BaseCommand):
+    """Django command to compare the fast list path with DRF serializers"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        # Everything is seeded inside a transaction that is rolled back,
+        # so the command can safely be pointed at a development database
+        with transaction.atomic():
+            user = seed_catalog(recipes=options['recipes'])
+            recipes = Recipe.objects.filter(user=user).order_by('-id')
+            tags = Tag.objects.filter(user=user).order_by('-name')
+
+            self._compare(
+                'recipes',
+                lambda: RecipeSerializer(
+                    recipes.prefetch_related('tags', 'ingredients'),
+                    many=True
+                ).data,
+                lambda: fastpath.serialize_recipes(recipes),
+                options['repeat'],
+            )
+            self._compare(
+                'tags',
+                lambda: TagSerializer(tags, many=True).data,
+                lambda: fastpath.serialize_names(tags),
+                options['repeat'],
+            )
+            transaction.set_rollback(True)
+
+    def _compare(self, label, slow, fast, repeat):
+        slow_time = best_of(slow, repeat)
+        fast_time = best_of(fast, repeat)
+        self.stdout.write(
+            f'{label}: serializer {slow_time * 1000:.1f}ms, '
+            f'fast path {fast_time * 1000:.1f}ms '
+            f'({slow_time / fast_time:.1f}x)'
+        )
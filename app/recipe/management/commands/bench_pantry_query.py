@@ -0,0 +1,76 @@
+import random
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import Ingredient, Recipe
+from recipe.benchmark import seed_catalog, best_of
+from recipe.pantry import cookable_recipes
+
+
+def cookable_in_python(user, pantry_ids, max_missing):
+    """The approach the pantry query replaces: load every link"""
+    pantry = set(pantry_ids)
+    missing = defaultdict(int)
+    links = Recipe.ingredients.through.objects.filter(
+        recipe__user=user
+    ).values_list('recipe_id', 'ingredient_id')
+    for recipe_id, ingredient_id in links:
+        missing[recipe_id] += ingredient_id not in pantry
+
+    return sorted(
+        (count, -recipe_id) for recipe_id, count in missing.items()
+        if count <= max_missing
+    )
+
+
+class Command(BaseCommand):
+    """Django command to time the pantry query at scale"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--pantry', type=int, default=150)
+        parser.add_argument('--max-missing', type=int, default=1)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        # Seeded inside a transaction that is rolled back, see
+        # bench_list_serializers
+        with transaction.atomic():
+            user = seed_catalog(recipes=options['recipes'])
+            if connection.vendor == 'postgresql':
+                # Fresh statistics, as autovacuum would have gathered on
+                # a real database
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE core_recipe')
+                    cursor.execute('ANALYZE core_recipe_ingredients')
+            ingredient_ids = list(
+                Ingredient.objects.filter(user=user)
+                .values_list('id', flat=True)
+            )
+            pantry_ids = random.Random(0).sample(
+                ingredient_ids, min(options['pantry'], len(ingredient_ids))
+            )
+            max_missing = options['max_missing']
+
+            matches = cookable_recipes(user, pantry_ids, max_missing)
+            found = matches.count()
+            # The first page, as returned by the pantry action, and the
+            # complete ranking
+            page_time = best_of(
+                lambda: list(matches[:100]), options['repeat']
+            )
+            sql_time = best_of(lambda: list(matches.all()), options['repeat'])
+            python_time = best_of(
+                lambda: cookable_in_python(user, pantry_ids, max_missing),
+                options['repeat']
+            )
+            self.stdout.write(
+                f"{found} of {options['recipes']} recipes cookable: "
+                f'first page {page_time * 1000:.1f}ms, '
+                f'query {sql_time * 1000:.1f}ms, '
+                f'python {python_time * 1000:.1f}ms '
+                f'({python_time / sql_time:.1f}x)'
+            )
+            transaction.set_rollback(True)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Recipe
+from recipe.benchmark import seed_catalog, best_of
+from recipe.similarity import similar_recipes
+
+
+class Command(BaseCommand):
+    """Django command to time the similar recipes query at scale"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        # Seeded inside a transaction that is rolled back, see
+        # bench_list_serializers
+        with transaction.atomic():
+            user = seed_catalog(
+                recipes=options['recipes'], tags=500, ingredients=2000
+            )
+            recipe = Recipe.objects.filter(user=user).order_by('id')[0]
+            timing = best_of(
+                lambda: similar_recipes(recipe, options['limit']),
+                options['repeat']
+            )
+            self.stdout.write(
+                f"top {options['limit']} of {options['recipes']} recipes: "
+                f'{timing * 1000:.1f}ms'
+            )
+            transaction.set_rollback(True)
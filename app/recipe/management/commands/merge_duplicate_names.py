@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Tag, Ingredient
+from recipe.dedupe import merge_duplicates
+
+
+class Command(BaseCommand):
+    """Django command to merge tags and ingredients whose names only
+    differ by case, repointing their recipe links"""
+
+    def handle(self, *args, **options):
+        for model in (Tag, Ingredient):
+            merged = merge_duplicates(model)
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: '
+                f'{merged} duplicate(s) merged'
+            )
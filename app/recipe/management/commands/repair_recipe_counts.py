@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from recipe.counters import COUNTED_FIELDS, repair_counts
+
+
+class Command(BaseCommand):
+    """Django command to recompute Tag/Ingredient.recipe_count"""
+
+    def handle(self, *args, **options):
+        for model in COUNTED_FIELDS:
+            repaired = repair_counts(model)
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: '
+                f'{repaired} count(s) repaired'
+            )
@@ -0,0 +1,21 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OptionalCursorPagination(CursorPagination):
+    """Cursor pagination for clients that ask for it.
+
+    Requests without a cursor or page_size parameter get the plain list
+    they always have. The ordering comes from the view's ordering filter,
+    see recipe.filters.StableOrderingFilter.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and \
+                self.page_size_query_param not in params:
+            return None
+
+        return super().paginate_queryset(queryset, request, view)
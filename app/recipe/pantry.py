@@ -0,0 +1,33 @@
+from django.db.models import Count, F, IntegerField, Q, Value
+
+from core.models import RecipeIngredient
+
+
+def cookable_recipes(user, pantry_ids, max_missing=0):
+    """Return (recipe id, missing) pairs for user's recipes needing at
+    most max_missing ingredients outside pantry_ids, fewest missing
+    first.
+
+    One grouped query over the through table: links are grouped by
+    recipe_id and the ones not covered by the pantry counted, so recipes
+    are only joined to filter by user. Grouping links rather than
+    recipes lets PostgreSQL aggregate straight off the (recipe_id,
+    ingredient_id) index. Recipes without ingredients never match.
+    """
+    if pantry_ids:
+        covered = Count(
+            'ingredient_id', filter=Q(ingredient_id__in=pantry_ids)
+        )
+    else:
+        covered = Value(0, output_field=IntegerField())
+
+    return RecipeIngredient.objects.filter(
+        recipe__user=user
+    ).values('recipe_id').annotate(
+        total=Count('ingredient_id'),
+        covered=covered,
+    ).annotate(
+        missing=F('total') - F('covered')
+    ).filter(
+        missing__lte=max_missing
+    ).order_by('missing', '-recipe_id').values_list('recipe_id', 'missing')
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from core.models import Tag, Ingredient, Recipe
+from core.models import Tag, Ingredient, Recipe, RecipeIngredient, Unit
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -12,6 +12,14 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
+class TagCountSerializer(TagSerializer):
+    """Serializer for Tag objects with the number of recipes using them"""
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ('recipe_count',)
+        read_only_fields = ('id', 'recipe_count',)
+
+
 class IngredientSerializer(serializers.ModelSerializer):
     """Serializer for Ingredient objects"""
 
@@ -21,8 +29,21 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
+class IngredientCountSerializer(IngredientSerializer):
+    """Serializer for Ingredient objects with the number of recipes
+    using them"""
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ('recipe_count',)
+        read_only_fields = ('id', 'recipe_count',)
+
+
 class RecipeSerializer(serializers.ModelSerializer):
-    """Serializer for Recipe objects"""
+    """Serializer for Recipe objects
+
+    fields= renders a subset of Meta.fields (image is only rendered when
+    asked for) and expand= nests tags/ingredients instead of their ids.
+    """
 
     ingredients = serializers.PrimaryKeyRelatedField(
         many=True,
@@ -34,12 +55,36 @@ class RecipeSerializer(serializers.ModelSerializer):
         queryset=Tag.objects.all()
     )
 
+    # Relations that can be expanded, and the serializer nesting them
+    expandable = {
+        'ingredients': IngredientSerializer,
+        'tags': TagSerializer,
+    }
+
     class Meta:
         model = Recipe
         fields = ('id', 'title', 'time_minutes',
-                  'price', 'ingredients', 'tags', 'link'
+                  'price', 'ingredients', 'tags', 'link', 'is_public',
+                  'image'
                   )
-        read_only_fields = ('id',)
+        read_only_fields = ('id', 'image',)
+        # Fields rendered when no fields= subset is given
+        default_fields = ('id', 'title', 'time_minutes',
+                          'price', 'ingredients', 'tags', 'link',
+                          'is_public'
+                          )
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+
+        keep = set(fields or self.Meta.default_fields)
+        for name in set(self.fields) - keep:
+            self.fields.pop(name)
+        for name in expand:
+            if name in self.fields:
+                self.fields[name] = self.expandable[name](
+                    many=True, read_only=True
+                )
 
 
 class RecipeDetailSerializer(RecipeSerializer):
@@ -55,3 +100,39 @@ class RecipeImageSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = ('id', 'image')
         read_only_fields = ('id',)
+
+
+class UnitField(serializers.SlugRelatedField):
+    """Unit given by name, in any case (e.g. "Tbsp")"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = data.strip().lower()
+        return super().to_internal_value(data)
+
+
+class RecipeIngredientSerializer(serializers.ModelSerializer):
+    """Serializer for the quantity of an ingredient in a recipe"""
+    name = serializers.CharField(source='ingredient.name', read_only=True)
+    unit = UnitField(
+        slug_field='name',
+        queryset=Unit.objects.all(),
+        allow_null=True,
+        required=False
+    )
+
+    class Meta:
+        model = RecipeIngredient
+        fields = ('ingredient', 'name', 'quantity', 'unit')
+        extra_kwargs = {'quantity': {'min_value': 0}}
+
+    def get_fields(self):
+        """Only accept the requesting user's ingredients"""
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is not None:
+            fields['ingredient'].queryset = Ingredient.objects.filter(
+                user=request.user
+            )
+
+        return fields
@@ -0,0 +1,104 @@
+import hashlib
+import uuid
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Case, Count, DecimalField, F, IntegerField, \
+    Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from core.models import RecipeIngredient
+
+# Lists are invalidated with the owner's stats on every write (see
+# recipe.stats.invalidate_stats), the timeout only bounds stale entries
+SHOPPING_LIST_CACHE_TIMEOUT = 60 * 60
+
+
+def shopping_version_key(user_id):
+    """Return the cache key holding the version of a user's lists"""
+    return f'shopping-list-version:{user_id}'
+
+
+def shopping_cache_key(user_id, recipe_ids):
+    """Return the cache key of a list, the same for any order of ids"""
+    version = cache.get(shopping_version_key(user_id))
+    if version is None:
+        version = uuid.uuid4().hex
+        # add() so concurrent readers agree on the first version
+        cache.add(shopping_version_key(user_id), version, None)
+        version = cache.get(shopping_version_key(user_id), version)
+    ids = ','.join(str(pk) for pk in sorted(recipe_ids))
+    digest = hashlib.sha1(ids.encode()).hexdigest()
+
+    return f'shopping-list:{user_id}:{version}:{digest}'
+
+
+def _quantity(value):
+    """Format a summed quantity without trailing zeros"""
+    if value is None:
+        return None
+    return f'{value.normalize():f}'
+
+
+def _servings(recipe_ids):
+    """Return an expression for how often each recipe is planned"""
+    planned = Counter(recipe_ids)
+    if all(count == 1 for count in planned.values()):
+        return Value(1, output_field=IntegerField())
+
+    return Case(
+        *[When(recipe_id=pk, then=Value(count))
+          for pk, count in planned.items()],
+        default=Value(1),
+        output_field=IntegerField()
+    )
+
+
+def compute_shopping_list(user, recipe_ids):
+    """Return the ingredients needed to cook user's recipes in recipe_ids.
+
+    recipe_ids is a meal plan, a recipe listed twice is cooked twice.
+    Quantities are converted to their base unit (g, ml or piece) through
+    the Unit table, multiplied by how often the recipe is planned and
+    added up by the database in one grouped query. An ingredient used in
+    units that don't convert into each other, say grams and pieces, gets
+    one entry per base unit. Amounts without a unit are summed as they
+    are, with a null unit.
+    """
+    servings = _servings(recipe_ids)
+    rows = RecipeIngredient.objects.filter(
+        recipe__user=user, recipe_id__in=set(recipe_ids)
+    ).values(
+        'ingredient_id', 'ingredient__name', 'unit__base'
+    ).annotate(
+        total=Sum(
+            F('quantity') * Coalesce('unit__factor', Value(1)) * servings,
+            output_field=DecimalField()
+        ),
+        recipes=Count('recipe_id'),
+        occurrences=Sum(servings)
+    ).order_by('ingredient__name', 'unit__base')
+
+    return [
+        {
+            'ingredient': row['ingredient_id'],
+            'name': row['ingredient__name'],
+            'quantity': _quantity(row['total']),
+            'unit': row['unit__base'],
+            'recipes': row['recipes'],
+            'occurrences': row['occurrences'],
+        }
+        for row in rows
+    ]
+
+
+def shopping_list(user, recipe_ids):
+    """Return the shopping list for a meal plan, computing it on a cache
+    miss"""
+    key = shopping_cache_key(user.pk, recipe_ids)
+    data = cache.get(key)
+    if data is None:
+        data = compute_shopping_list(user, recipe_ids)
+        cache.set(key, data, SHOPPING_LIST_CACHE_TIMEOUT)
+
+    return data
@@ -0,0 +1,107 @@
+from django.db.models.signals import pre_save, post_save, post_delete, \
+    pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.catalog import canonical_id
+from recipe.counters import adjust_counts
+from recipe.stats import invalidate_stats
+
+
+# Through model -> model whose recipe_count it drives
+COUNTED_THROUGH = {
+    Recipe.tags.through: Tag,
+    Recipe.ingredients.through: Ingredient,
+}
+
+
+@receiver(pre_save, sender=Tag)
+@receiver(pre_save, sender=Ingredient)
+def link_canonical(sender, instance, update_fields=None, **kwargs):
+    """Point a tag or ingredient at the catalog entry for its name"""
+    if update_fields is not None and \
+            not {'name', 'canonical'}.intersection(update_fields):
+        return  # a partial save that leaves the name alone
+    instance.canonical_id = canonical_id(sender, instance.name)
+    if update_fields is not None and 'canonical' not in update_fields:
+        # A partial rename only writes update_fields, so store the new
+        # link separately
+        sender.objects.filter(pk=instance.pk).update(
+            canonical_id=instance.canonical_id
+        )
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_owner_stats(sender, instance, **kwargs):
+    """Drop the owner's cached stats when a recipe, tag or ingredient
+    is created, renamed or deleted"""
+    invalidate_stats(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_linked_stats(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    """Drop cached stats when tags or ingredients are (un)linked"""
+    if not action.startswith('post_'):
+        return
+
+    user_ids = {instance.user_id}
+    if reverse and pk_set:
+        # instance is a tag/ingredient, pk_set holds the recipe ids
+        user_ids.update(
+            Recipe.objects.filter(pk__in=pk_set)
+            .values_list('user_id', flat=True)
+        )
+    invalidate_stats(*user_ids)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_recipe_counts(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """Keep Tag/Ingredient.recipe_count in step with the through table"""
+    counted = COUNTED_THROUGH[sender]
+    column = f'{counted._meta.model_name}_id'  # tag -> tag_id
+
+    if action == 'post_add':
+        # pk_set only holds the links that were actually inserted
+        if reverse:
+            adjust_counts(counted, [instance.pk], len(pk_set))
+        else:
+            adjust_counts(counted, pk_set, 1)
+        return
+    if action not in ('pre_remove', 'pre_clear'):
+        return
+
+    # remove() reports every requested id whether it was linked or not, so
+    # count the existing links before they are deleted
+    if reverse:
+        links = sender.objects.filter(**{column: instance.pk})
+        if action == 'pre_remove':
+            links = links.filter(recipe_id__in=pk_set)
+        adjust_counts(counted, [instance.pk], -links.count())
+    else:
+        links = sender.objects.filter(recipe_id=instance.pk)
+        if action == 'pre_remove':
+            links = links.filter(**{f'{column}__in': pk_set})
+        adjust_counts(counted, links.values_list(column, flat=True), -1)
+
+
+@receiver(pre_delete, sender=Recipe)
+def release_recipe_counts(sender, instance, **kwargs):
+    """Decrement counts of a recipe's tags and ingredients before its
+    through rows are cascaded away (which sends no m2m_changed)"""
+    for through, counted in COUNTED_THROUGH.items():
+        column = f'{counted._meta.model_name}_id'
+        adjust_counts(
+            counted,
+            through.objects.filter(recipe_id=instance.pk)
+            .values_list(column, flat=True),
+            -1
+        )
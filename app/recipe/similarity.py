@@ -0,0 +1,65 @@
+from django.db import connections
+
+from core.models import Recipe
+
+# Candidates with the most shared tags/ingredients whose exact Jaccard
+# score is computed, as a multiple of the number of results asked for
+CANDIDATE_POOL_FACTOR = 10
+MIN_CANDIDATE_POOL = 100
+
+
+def _similar_sql():
+    """Return the SQL ranking recipes by Jaccard similarity to one recipe.
+
+    The through tables act as the inverted index: their tag_id and
+    ingredient_id indexes find the recipes sharing an item with the
+    target, which are counted per recipe of the same user. Other users'
+    recipes are dropped before the pool is cut so they can't crowd the
+    user's own out of it. Only the best candidate pool by shared items
+    gets the exact score, which needs each candidate's own number of tags
+    and ingredients.
+    """
+    tags = Recipe.tags.through._meta.db_table
+    ingredients = Recipe.ingredients.through._meta.db_table
+    recipes = Recipe._meta.db_table
+
+    return (
+        'WITH target AS ('
+        f'  SELECT 0 AS kind, tag_id AS item FROM {tags} WHERE recipe_id = %s'
+        '  UNION ALL'
+        '  SELECT 1, ingredient_id'
+        f'  FROM {ingredients} WHERE recipe_id = %s'
+        '), candidates AS ('
+        '  SELECT links.recipe_id, count(*) AS shared FROM ('
+        f'    SELECT recipe_id FROM {tags} WHERE tag_id IN ('
+        '      SELECT item FROM target WHERE kind = 0)'
+        '    UNION ALL'
+        f'    SELECT recipe_id FROM {ingredients} WHERE ingredient_id IN ('
+        '      SELECT item FROM target WHERE kind = 1)'
+        f'  ) links JOIN {recipes} r ON r.id = links.recipe_id'
+        '  WHERE r.user_id = %s AND links.recipe_id <> %s'
+        '  GROUP BY links.recipe_id'
+        '  ORDER BY shared DESC, links.recipe_id DESC LIMIT %s'
+        ') '
+        'SELECT c.recipe_id, c.shared::float / ('
+        '  (SELECT count(*) FROM target)'
+        f'  + (SELECT count(*) FROM {tags} t WHERE t.recipe_id = c.recipe_id)'
+        f'  + (SELECT count(*) FROM {ingredients} i'
+        '     WHERE i.recipe_id = c.recipe_id)'
+        '  - c.shared'
+        ') AS score '
+        'FROM candidates c '
+        'ORDER BY score DESC, c.recipe_id DESC LIMIT %s'
+    )
+
+
+def similar_recipes(recipe, limit=10):
+    """Return (recipe id, Jaccard score) pairs for the limit recipes of
+    the same user sharing the most tags and ingredients with recipe, in
+    one query"""
+    pool = max(limit * CANDIDATE_POOL_FACTOR, MIN_CANDIDATE_POOL)
+    with connections[Recipe.objects.db].cursor() as cursor:
+        cursor.execute(_similar_sql(), [
+            recipe.pk, recipe.pk, recipe.user_id, recipe.pk, pool, limit
+        ])
+        return cursor.fetchall()
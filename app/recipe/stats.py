@@ -0,0 +1,119 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, Max, Min, Q
+
+from core.models import Recipe
+from recipe.shopping import shopping_version_key
+
+
+# Stats are invalidated by recipe/signals.py on every write, the timeout
+# only bounds how long an orphaned entry can linger
+STATS_CACHE_TIMEOUT = 60 * 60
+# Upper bounds of the price histogram buckets, the last one is open ended
+PRICE_BUCKETS = (5, 10, 20, 50)
+TOP_ITEMS = 5
+
+CENT = Decimal('0.01')
+
+
+def stats_cache_key(user_id):
+    """Return the cache key holding the stats for a user"""
+    return f'recipe-stats:{user_id}'
+
+
+def invalidate_stats(*user_ids):
+    """Drop cached stats and shopping lists for the given users"""
+    cache.delete_many(
+        [stats_cache_key(user_id) for user_id in user_ids] +
+        [shopping_version_key(user_id) for user_id in user_ids]
+    )
+
+
+def _price(value):
+    """Format a Decimal the way recipe prices are rendered"""
+    if value is None:
+        return None
+    return str(value.quantize(CENT))
+
+
+def _price_buckets():
+    """Return (label, filter) pairs for the price histogram"""
+    buckets = []
+    lower = 0
+    for upper in PRICE_BUCKETS:
+        buckets.append((
+            f'{lower}-{upper}',
+            Q(price__gte=lower, price__lt=upper)
+        ))
+        lower = upper
+    buckets.append((f'{lower}+', Q(price__gte=lower)))
+
+    return buckets
+
+
+def _top_related(user, field_name):
+    """Return the most used tags or ingredients across user's recipes"""
+    target = field_name[:-1]  # tags -> tag
+    through = getattr(Recipe, field_name).through
+    rows = through.objects.filter(recipe__user=user).values(
+        f'{target}_id', f'{target}__name'
+    ).annotate(
+        recipe_count=Count('recipe_id')
+    ).order_by('-recipe_count', f'{target}__name')[:TOP_ITEMS]
+
+    return [
+        {
+            'id': row[f'{target}_id'],
+            'name': row[f'{target}__name'],
+            'recipe_count': row['recipe_count'],
+        }
+        for row in rows
+    ]
+
+
+def compute_stats(user):
+    """Compute recipe stats for user with three aggregate queries"""
+    buckets = _price_buckets()
+    aggregates = {
+        f'bucket_{i}': Count('id', filter=bucket_filter)
+        for i, (_, bucket_filter) in enumerate(buckets)
+    }
+    totals = Recipe.objects.filter(user=user).aggregate(
+        recipe_count=Count('id'),
+        average_time_minutes=Avg('time_minutes'),
+        min_price=Min('price'),
+        max_price=Max('price'),
+        average_price=Avg('price'),
+        **aggregates
+    )
+
+    average_time = totals['average_time_minutes']
+    return {
+        'recipe_count': totals['recipe_count'],
+        'average_time_minutes': (
+            round(average_time, 1) if average_time is not None else None
+        ),
+        'price': {
+            'min': _price(totals['min_price']),
+            'max': _price(totals['max_price']),
+            'average': _price(totals['average_price']),
+            'distribution': [
+                {'range': label, 'recipe_count': totals[f'bucket_{i}']}
+                for i, (label, _) in enumerate(buckets)
+            ],
+        },
+        'top_tags': _top_related(user, 'tags'),
+        'top_ingredients': _top_related(user, 'ingredients'),
+    }
+
+
+def get_stats(user):
+    """Return recipe stats for user, computing them on a cache miss"""
+    key = stats_cache_key(user.id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_stats(user)
+        cache.set(key, stats, STATS_CACHE_TIMEOUT)
+
+    return stats
@@ -0,0 +1,138 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, CatalogTag, CatalogIngredient
+from core.tests.factories import create_user
+from recipe.catalog import canonical_id, normalize_name
+
+TAGS_URL = reverse('recipe:tag-list')
+TAG_CATALOG_URL = reverse('recipe:tag-catalog')
+INGREDIENT_CATALOG_URL = reverse('recipe:ingredient-catalog')
+
+CACHED_CATALOG = dict(settings.CACHES, catalog={
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'test-catalog',
+})
+
+
+class CatalogTests(TestCase):
+    """Test the catalog shared by every user's tags and ingredients"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_normalize_name(self):
+        """Test case and whitespace differences are ignored"""
+        self.assertEqual(normalize_name('  Sea   SALT '), 'sea salt')
+
+    def test_aliases_share_catalog_entry(self):
+        """Test tags with the same normalized name share one entry"""
+        other = create_user('other@test.com')
+        mine = Tag.objects.create(user=self.user, name='Vegan')
+        theirs = Tag.objects.create(user=other, name=' vegan')
+
+        self.assertEqual(mine.canonical_id, theirs.canonical_id)
+        self.assertEqual(CatalogTag.objects.get().name, 'Vegan')
+        # Every user keeps their own spelling
+        self.assertEqual(theirs.name, ' vegan')
+
+    def test_create_through_api(self):
+        """Test the API response is unchanged and the tag is linked"""
+        res = self.client.post(TAGS_URL, {'name': 'Dessert'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(set(res.data), {'id', 'name'})
+        tag = Tag.objects.get(pk=res.data['id'])
+        self.assertEqual(tag.canonical.name, 'Dessert')
+
+    def test_api_keeps_own_spelling(self):
+        """Test responses show the user's spelling, not the catalog's"""
+        Tag.objects.create(user=create_user('other@test.com'), name='vegan')
+
+        res = self.client.post(TAGS_URL, {'name': 'VEGAN'})
+
+        self.assertEqual(res.data['name'], 'VEGAN')
+        res = self.client.get(TAGS_URL)
+        self.assertEqual([tag['name'] for tag in res.data], ['VEGAN'])
+
+    def test_rename_relinks(self):
+        """Test renaming a tag points it at the entry for the new name"""
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+
+        ingredient.name = 'Pepper'
+        ingredient.save()
+
+        self.assertEqual(ingredient.canonical.name, 'Pepper')
+        self.assertEqual(CatalogIngredient.objects.count(), 2)
+
+    def test_partial_rename_relinks(self):
+        """Test a rename saved with update_fields updates the link"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+
+        tag.name = 'Vegetarian'
+        tag.save(update_fields=['name'])
+
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'Vegetarian')
+        self.assertEqual(tag.canonical.name, 'Vegetarian')
+
+    def test_search_catalog(self):
+        """Test the catalog action suggests names of any user"""
+        other = create_user('other@test.com')
+        Ingredient.objects.create(user=other, name='Garlic')
+        Ingredient.objects.create(user=other, name='Ginger')
+        Ingredient.objects.create(user=other, name='Salt')
+
+        res = self.client.get(INGREDIENT_CATALOG_URL, {'search': 'g'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [entry['name'] for entry in res.data], ['Garlic', 'Ginger']
+        )
+
+    def test_search_login_required(self):
+        """Test the catalog isn't public"""
+        res = APIClient().get(TAG_CATALOG_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(CACHES=CACHED_CATALOG)
+class CatalogCacheTests(TestCase):
+    """Test catalog lookups are served from the cache"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+
+    def setUp(self):
+        caches['catalog'].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_canonical_id_cached(self):
+        """Test a known name is resolved without a query"""
+        pk = canonical_id(Tag, 'Vegan')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(canonical_id(Tag, 'VEGAN '), pk)
+
+    def test_search_cached(self):
+        """Test repeated searches don't query the catalog"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(TAG_CATALOG_URL, {'search': 've'})
+
+        with self.assertNumQueries(0):
+            res = self.client.get(TAG_CATALOG_URL, {'search': 'Ve'})
+
+        self.assertEqual(res.data[0]['name'], 'Vegan')
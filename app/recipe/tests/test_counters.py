@@ -0,0 +1,90 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Recipe, Tag, Ingredient
+from core.tests.factories import create_user, sample_recipe
+
+
+class RecipeCountTests(TestCase):
+    """Test the denormalized recipe_count on tags and ingredients"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.tag = Tag.objects.create(user=cls.user, name='Vegan')
+        cls.other_tag = Tag.objects.create(user=cls.user, name='Quick')
+        cls.ingredient = Ingredient.objects.create(
+            user=cls.user, name='Salt'
+        )
+
+    def assertCounts(self, tag, other_tag, ingredient):
+        """Assert the current recipe_count of each fixture"""
+        self.tag.refresh_from_db()
+        self.other_tag.refresh_from_db()
+        self.ingredient.refresh_from_db()
+        self.assertEqual(
+            (self.tag.recipe_count, self.other_tag.recipe_count,
+             self.ingredient.recipe_count),
+            (tag, other_tag, ingredient)
+        )
+
+    def test_add_remove_clear(self):
+        """Test counts follow add, duplicate add, remove and clear"""
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(self.tag, self.other_tag)
+        recipe.tags.add(self.tag)
+        recipe.ingredients.add(self.ingredient)
+        self.assertCounts(1, 1, 1)
+
+        recipe.tags.remove(self.tag)
+        recipe.tags.remove(self.tag)
+        self.assertCounts(0, 1, 1)
+
+        recipe.ingredients.clear()
+        self.assertCounts(0, 1, 0)
+
+        recipe.tags.set([self.tag])
+        self.assertCounts(1, 0, 0)
+
+    def test_reverse_add_remove(self):
+        """Test counts follow changes made from the tag side"""
+        recipe1 = sample_recipe(self.user)
+        recipe2 = sample_recipe(self.user)
+
+        self.tag.recipe_set.add(recipe1, recipe2)
+        self.assertCounts(2, 0, 0)
+
+        self.tag.recipe_set.remove(recipe1)
+        self.assertCounts(1, 0, 0)
+
+        self.tag.recipe_set.clear()
+        self.assertCounts(0, 0, 0)
+
+    def test_recipe_delete(self):
+        """Test deleting recipes releases their counts"""
+        recipe1 = sample_recipe(self.user)
+        recipe2 = sample_recipe(self.user)
+        recipe1.tags.add(self.tag)
+        recipe2.tags.add(self.tag)
+        recipe2.ingredients.add(self.ingredient)
+
+        recipe1.delete()
+        self.assertCounts(1, 0, 1)
+
+        Recipe.objects.filter(user=self.user).delete()
+        self.assertCounts(0, 0, 0)
+
+    def test_repair_command(self):
+        """Test repair_recipe_counts fixes drifted counts"""
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(self.tag)
+        Tag.objects.filter(pk=self.tag.pk).update(recipe_count=7)
+        Tag.objects.filter(pk=self.other_tag.pk).update(recipe_count=3)
+
+        out = StringIO()
+        call_command('repair_recipe_counts', stdout=out)
+
+        self.assertCounts(1, 0, 0)
+        self.assertIn('tags: 2 count(s) repaired', out.getvalue())
@@ -0,0 +1,97 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient
+from core.tests.factories import create_user, sample_recipe
+from recipe.dedupe import merge_duplicates
+
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class UniqueNameTests(TestCase):
+    """Test tag and ingredient names are unique per user, ignoring case"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_create_returns_existing(self):
+        """Test creating an existing name returns it with 200"""
+        res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        again = self.client.post(TAGS_URL, {'name': 'VEGAN'})
+
+        self.assertEqual(again.status_code, status.HTTP_200_OK)
+        self.assertEqual(again.data, res.data)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_create_links_catalog(self):
+        """Test rows created through ON CONFLICT are linked and saved"""
+        res = self.client.post(INGREDIENTS_URL, {'name': 'Salt'})
+
+        ingredient = Ingredient.objects.get(pk=res.data['id'])
+        self.assertEqual(ingredient.name, 'Salt')
+        self.assertEqual(ingredient.canonical.name, 'Salt')
+
+    def test_other_users_unaffected(self):
+        """Test the same name can exist for different users"""
+        other = create_user('other@test.com')
+        Tag.objects.create(user=other, name='Vegan')
+
+        res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_database_rejects_duplicates(self):
+        """Test the unique index covers writes outside the API"""
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Tag.objects.create(user=self.user, name='vegan')
+
+    def test_merge_duplicates(self):
+        """Test duplicates are merged into the oldest row"""
+        # Rolled back with the rest of the test
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX core_tag_user_lower_name_uniq')
+        keep = Tag.objects.create(user=self.user, name='Vegan')
+        dup1 = Tag.objects.create(user=self.user, name='vegan')
+        dup2 = Tag.objects.create(user=self.user, name='VEGAN')
+        other = Tag.objects.create(user=self.user, name='Dessert')
+        recipe1 = sample_recipe(self.user)
+        recipe2 = sample_recipe(self.user)
+        recipe1.tags.add(keep, dup1)
+        recipe2.tags.add(dup2, other)
+
+        merged = merge_duplicates(Tag)
+
+        self.assertEqual(merged, 2)
+        self.assertEqual(
+            set(Tag.objects.values_list('name', flat=True)),
+            {'Vegan', 'Dessert'}
+        )
+        self.assertEqual(list(recipe1.tags.all()), [keep])
+        self.assertEqual(set(recipe2.tags.all()), {keep, other})
+        keep.refresh_from_db()
+        self.assertEqual(keep.recipe_count, 2)
+
+    def test_merge_command(self):
+        """Test the command reports what it merged"""
+        out = StringIO()
+
+        call_command('merge_duplicate_names', stdout=out)
+
+        self.assertIn('tags: 0 duplicate(s) merged', out.getvalue())
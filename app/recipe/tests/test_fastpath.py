@@ -0,0 +1,189 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import mixins, status, viewsets
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import Recipe, Tag, Ingredient
+from core.tests.factories import create_user
+from recipe import fastpath
+from recipe.views import RecipeViewSet, BaseViewSet, FastListMixin
+from recipe.serializers import RecipeSerializer, TagSerializer, \
+    IngredientSerializer, RecipeDetailSerializer
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class PlainTagViewSet(FastListMixin,
+                      viewsets.GenericViewSet,
+                      mixins.ListModelMixin):
+    """Fast list viewset without its own serialize_list()"""
+    queryset = Tag.objects.order_by('id')
+    serializer_class = TagSerializer
+    pagination_class = None
+
+
+def render(data):
+    """Render data to the exact bytes sent to clients"""
+    return JSONRenderer().render(data)
+
+
+class FastPathTests(TestCase):
+    """Test the read-only list serialization path"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+
+        vegan = Tag.objects.create(user=cls.user, name='Vegan')
+        dessert = Tag.objects.create(user=cls.user, name='Dessert')
+        salt = Ingredient.objects.create(user=cls.user, name='Salt')
+        lime = Ingredient.objects.create(user=cls.user, name='Lime')
+
+        cls.recipe = Recipe.objects.create(
+            user=cls.user, title='Lime pie', time_minutes=45,
+            price=7.5, link='https://example.com/pie'
+        )
+        cls.recipe.tags.add(vegan, dessert)
+        cls.recipe.ingredients.add(salt, lime)
+        Recipe.objects.create(
+            user=cls.user, title='Plain toast', time_minutes=2, price=0.3
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_recipes_byte_identical(self):
+        """Test fast recipe rows render exactly like RecipeSerializer"""
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+
+        expected = RecipeSerializer(recipes, many=True).data
+
+        self.assertEqual(
+            render(fastpath.serialize_recipes(recipes)),
+            render(expected)
+        )
+
+    def test_names_byte_identical(self):
+        """Test fast tag and ingredient rows match their serializers"""
+        tags = Tag.objects.filter(user=self.user).order_by('-name')
+        ingredients = Ingredient.objects.filter(user=self.user)
+
+        self.assertEqual(
+            render(fastpath.serialize_names(tags)),
+            render(TagSerializer(tags, many=True).data)
+        )
+        self.assertEqual(
+            render(fastpath.serialize_names(ingredients)),
+            render(IngredientSerializer(ingredients, many=True).data)
+        )
+
+    def test_recipe_list_constant_queries(self):
+        """Test the recipe list costs one query per table, not per row"""
+        for i in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user, title=f'Extra {i}', time_minutes=1, price=1
+            )
+            recipe.tags.add(*Tag.objects.filter(user=self.user))
+
+        # recipes, ingredient ids, tag ids
+        with self.assertNumQueries(3):
+            fastpath.serialize_recipes(Recipe.objects.filter(user=self.user))
+
+    def test_list_without_serialize_list(self):
+        """Test viewsets without a fast path list with their serializer"""
+        view = PlainTagViewSet.as_view({'get': 'list'})
+
+        res = view(APIRequestFactory().get('/'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            TagSerializer(Tag.objects.order_by('id'), many=True).data
+        )
+
+    def test_list_endpoints_use_fast_path(self):
+        """Test list responses are identical with the fast path disabled"""
+        fast_recipes = self.client.get(RECIPES_URL).content
+        fast_tags = self.client.get(TAGS_URL).content
+        with patch.object(RecipeViewSet, 'fast_list', False), \
+                patch.object(BaseViewSet, 'fast_list', False):
+            slow_recipes = self.client.get(RECIPES_URL).content
+            slow_tags = self.client.get(TAGS_URL).content
+
+        self.assertEqual(fast_recipes, slow_recipes)
+        self.assertEqual(fast_tags, slow_tags)
+
+    def test_recipe_details_byte_identical(self):
+        """Test aggregated details render like RecipeDetailSerializer"""
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+        expected = render(RecipeDetailSerializer(recipes, many=True).data)
+
+        with self.assertNumQueries(1):
+            data = fastpath.serialize_recipe_details(recipes)
+        self.assertEqual(render(data), expected)
+
+        with patch.object(fastpath, '_is_postgresql', return_value=False):
+            with self.assertNumQueries(3):
+                data = fastpath.serialize_recipe_details(recipes)
+        self.assertEqual(render(data), expected)
+
+    def test_retrieve_uses_aggregates(self):
+        """Test the detail endpoint is one query after authentication"""
+        url = detail_url(self.recipe.id)
+        with self.assertNumQueries(1):
+            res = self.client.get(url)
+
+        with patch.object(RecipeViewSet, 'aggregate_actions', ()):
+            slow = self.client.get(url)
+        self.assertEqual(res.content, slow.content)
+
+    def test_retrieve_aggregates_not_found(self):
+        """Test other users' recipes and malformed ids return 404"""
+        other = create_user('other@test.com')
+        recipe = Recipe.objects.create(
+            user=other, title='Secret', time_minutes=1, price=1
+        )
+
+        res = self.client.get(detail_url(recipe.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(detail_url('abc'))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_sparse_fields_match_serializer(self):
+        """Test fields= and expand= render alike on both paths"""
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            image='uploads/recipe/pie.jpg'
+        )
+        cases = (
+            {'fields': 'id,title,image'},
+            {'fields': 'title,tags', 'expand': 'tags'},
+            {'expand': 'tags,ingredients'},
+            {'fields': 'price,ingredients'},
+        )
+
+        for params in cases:
+            fast = self.client.get(RECIPES_URL, params).content
+            with patch.object(RecipeViewSet, 'fast_list', False):
+                slow = self.client.get(RECIPES_URL, params).content
+            self.assertEqual(fast, slow, params)
+
+    def test_sparse_fields_skip_relations(self):
+        """Test leaving out tags and ingredients skips their queries"""
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL, {'fields': 'id,title,image'})
+
+        self.assertEqual(
+            set(res.data[0]), {'id', 'title', 'image'}
+        )
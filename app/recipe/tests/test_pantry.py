@@ -0,0 +1,92 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient
+from core.tests.factories import create_user, sample_recipe
+
+PANTRY_URL = reverse('recipe:recipe-pantry')
+
+
+class PantryApiTests(TestCase):
+    """Test finding recipes that can be cooked from a pantry"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.eggs, cls.flour, cls.milk, cls.sugar = [
+            Ingredient.objects.create(user=cls.user, name=name)
+            for name in ('Eggs', 'Flour', 'Milk', 'Sugar')
+        ]
+        cls.omelette = sample_recipe(
+            cls.user, title='Omelette', ingredients=[cls.eggs]
+        )
+        cls.pancakes = sample_recipe(
+            cls.user, title='Pancakes',
+            ingredients=[cls.eggs, cls.flour, cls.milk]
+        )
+        cls.cake = sample_recipe(
+            cls.user, title='Cake',
+            ingredients=[cls.eggs, cls.flour, cls.milk, cls.sugar]
+        )
+        sample_recipe(cls.user, title='Water')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def pantry(self, *ingredients, **params):
+        params['ingredients'] = ','.join(
+            str(ingredient.id) for ingredient in ingredients
+        )
+        return self.client.get(PANTRY_URL, params)
+
+    def test_fully_covered(self):
+        """Test only recipes without missing ingredients by default"""
+        res = self.pantry(self.eggs, self.flour, self.milk)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(recipe['title'], recipe['missing']) for recipe in res.data],
+            [('Pancakes', 0), ('Omelette', 0)]
+        )
+
+    def test_ranked_by_missing(self):
+        """Test max_missing includes partly covered recipes, best first"""
+        # get the ranking, then the list fast path
+        with self.assertNumQueries(4):
+            res = self.pantry(self.eggs, self.flour, max_missing=2)
+
+        self.assertEqual(
+            [(recipe['title'], recipe['missing']) for recipe in res.data],
+            [('Omelette', 0), ('Pancakes', 1), ('Cake', 2)]
+        )
+
+    def test_empty_pantry(self):
+        """Test an empty pantry only matches within max_missing"""
+        res = self.pantry(max_missing=1)
+
+        self.assertEqual(
+            [recipe['title'] for recipe in res.data], ['Omelette']
+        )
+
+    def test_other_users_recipes_excluded(self):
+        """Test the pantry only searches the user's recipes"""
+        other = create_user('other@test.com')
+        sample_recipe(
+            other, title='Boiled egg', ingredients=[self.eggs]
+        )
+
+        res = self.pantry(self.eggs)
+
+        self.assertEqual(
+            [recipe['title'] for recipe in res.data], ['Omelette']
+        )
+
+    def test_invalid_params(self):
+        """Test malformed ids are rejected"""
+        res = self.client.get(PANTRY_URL, {'ingredients': 'eggs'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,134 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import get_resolver, include, path, re_path, resolve, \
+    reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.middleware import bypass_middleware, bypass_prefixes
+from core.models import Recipe, Tag
+from core.tests.factories import create_user
+from recipe.views import PublicRecipeView
+
+
+def public_url(recipe_id):
+    """Return the public recipe URL"""
+    return reverse('recipe:public-recipe', args=[recipe_id])
+
+
+class PublicRecipeApiTests(TestCase):
+    """Test reading shared recipes without logging in"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.recipe = Recipe.objects.create(
+            user=cls.user, title='Shared soup', time_minutes=20,
+            price=4.00, is_public=True
+        )
+        cls.tag = Tag.objects.create(user=cls.user, name='Soup')
+        cls.recipe.tags.add(cls.tag)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_public_recipe(self):
+        """Test a shared recipe is served in one query with cache
+        headers"""
+        with self.assertNumQueries(1):
+            res = self.client.get(public_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'Shared soup')
+        self.assertEqual(
+            res.data['tags'], [{'id': self.tag.id, 'name': 'Soup'}]
+        )
+        self.assertNotIn('is_public', res.data)
+        self.assertIn('public', res['Cache-Control'])
+        self.assertIn('max-age=', res['Cache-Control'])
+        self.assertTrue(res['ETag'].startswith('"'))
+        # Session and authentication middleware never ran
+        self.assertFalse(res.has_header('Vary'))
+        self.assertFalse(res.has_header('X-Frame-Options'))
+
+    def test_other_paths_not_resolved(self):
+        """Test requests outside the public prefixes skip the bypass
+        check's URL resolution"""
+        with patch('core.middleware.resolve', wraps=resolve) as spy:
+            self.client.get(reverse('recipe:tag-list'))
+            self.client.get(public_url(self.recipe.id))
+
+        self.assertEqual(spy.call_count, 1)
+
+    def test_bypass_prefixes_follow_urlconf(self):
+        """Test the bypassed prefixes come from where the views are
+        mounted"""
+        view = bypass_middleware(PublicRecipeView.as_view())
+        patterns = [
+            path('v2/', include([
+                path('shared/<int:pk>/', view),
+                path('tags/', PublicRecipeView.as_view()),
+            ])),
+            re_path(r'^v3/(?P<lang>\w+)/', include([path('x/', view)])),
+        ]
+
+        self.assertEqual(
+            list(bypass_prefixes(patterns)), ['/v2/shared/', '/v3/']
+        )
+        self.assertEqual(
+            list(bypass_prefixes(get_resolver().url_patterns)),
+            [public_url(self.recipe.id).rsplit('/', 2)[0] + '/']
+        )
+
+    def test_private_recipe_not_found(self):
+        """Test recipes that aren't shared are not served"""
+        Recipe.objects.filter(pk=self.recipe.pk).update(is_public=False)
+
+        res = self.client.get(public_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(res.has_header('ETag'))
+
+    def test_if_none_match(self):
+        """Test revalidating with the ETag returns 304 until it changes"""
+        etag = self.client.get(public_url(self.recipe.id))['ETag']
+
+        res = self.client.get(
+            public_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+        Recipe.objects.filter(pk=self.recipe.pk).update(title='New soup')
+        res = self.client.get(
+            public_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_credentials_ignored(self):
+        """Test authentication is skipped, invalid tokens don't matter"""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(public_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_share_recipe(self):
+        """Test owners share a recipe by setting is_public"""
+        recipe = Recipe.objects.create(
+            user=self.user, title='Secret stew', time_minutes=60, price=9
+        )
+        self.client.force_authenticate(self.user)
+
+        res = self.client.patch(
+            reverse('recipe:recipe-detail', args=[recipe.id]),
+            {'is_public': True}
+        )
+        self.assertTrue(res.data['is_public'])
+
+        self.client.force_authenticate(None)
+        res = self.client.get(public_url(recipe.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -1,19 +1,21 @@
 import tempfile
-import os
 
 from PIL import Image
 
-from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.urls import reverse
 from django.test import TestCase
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Recipe, Tag, Ingredient
+from core.models import Recipe, RecipeIngredient, Unit
+from core.tests.factories import create_user, sample_tag, \
+    sample_ingredient, sample_recipe
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 RECIPES_URL = reverse('recipe:recipe-list')
+BATCH_URL = reverse('recipe:recipe-batch')
 
 # recipe: - this is the name of the app defined
 # recipe - this is the name of the model linked to the view
@@ -32,30 +34,9 @@ def detail_url(recipe_id):
     return reverse('recipe:recipe-detail', args=[recipe_id])
 
 
-def sampleTag(user, name='Main Course'):
-    """Create and return a sample tag"""
-    return Tag.objects.create(
-        user=user, name=name
-    )
-
-
-def sampleIngredient(user, name='Cinnamon'):
-    """Create and return a sample ingredient"""
-    return Ingredient.objects.create(
-        user=user, name=name
-    )
-
-
-def sampleRecipe(user, **params):
-    """Create and return a sample recipe"""
-    defaults = {
-        'title': 'Sample recipe',
-        'time_minutes': 10,
-        'price': 5.00
-    }
-    defaults.update(params)
-
-    return Recipe.objects.create(user=user, **defaults)
+def duplicate_url(recipe_id):
+    """Return recipe duplicate URL"""
+    return reverse('recipe:recipe-duplicate', args=[recipe_id])
 
 
 class PublicRecipeApiTests(TestCase):
@@ -74,19 +55,19 @@ class PublicRecipeApiTests(TestCase):
 class PrivateRecipeApiTests(TestCase):
     """Test authenticated recipe API access"""
 
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+
     def setUp(self):
         self.client = APIClient()
-        self.user = get_user_model().objects.create_user(
-            'raymond@test.com'
-            'test123'
-        )
         self.client.force_authenticate(self.user)
 
     def test_retrieve_recipes(self):
         """Test retrieving a list of recipes"""
         # Create 2 sample recipes
-        sampleRecipe(user=self.user)
-        sampleRecipe(user=self.user)
+        sample_recipe(user=self.user)
+        sample_recipe(user=self.user)
 
         res = self.client.get(RECIPES_URL)
 
@@ -98,12 +79,9 @@ class PrivateRecipeApiTests(TestCase):
 
     def test_recipe_limited_to_user(self):
         """Test retrieving recipes for user"""
-        user2 = get_user_model().objects.create_user(
-            'another@test.com',
-            'test123'
-        )
-        sampleRecipe(user=user2)
-        sampleRecipe(user=self.user)
+        user2 = create_user('another@test.com')
+        sample_recipe(user=user2)
+        sample_recipe(user=self.user)
 
         res = self.client.get(RECIPES_URL)
 
@@ -117,9 +95,9 @@ class PrivateRecipeApiTests(TestCase):
 
     def test_recipe_detail(self):
         """Test viewing recipe detail"""
-        recipe = sampleRecipe(user=self.user)
-        recipe.tags.add(sampleTag(user=self.user))
-        recipe.ingredients.add(sampleIngredient(user=self.user))
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(sample_tag(user=self.user))
+        recipe.ingredients.add(sample_ingredient(user=self.user))
 
         url = detail_url(recipe.id)
         res = self.client.get(url)
@@ -146,8 +124,8 @@ class PrivateRecipeApiTests(TestCase):
 
     def test_create_recipe_with_tags(self):
         """Creating a recipe with tags"""
-        tag1 = sampleTag(user=self.user, name='Vegan')
-        tag2 = sampleTag(user=self.user, name='Dessert')
+        tag1 = sample_tag(user=self.user, name='Vegan')
+        tag2 = sample_tag(user=self.user, name='Dessert')
         payload = {
             'title': 'Avocado lime cheesecake',
             'tags': [tag1.id, tag2.id],
@@ -165,8 +143,8 @@ class PrivateRecipeApiTests(TestCase):
 
     def test_create_recipe_with_ingredients(self):
         """Test creating recipe with ingredients"""
-        ingredient1 = sampleIngredient(user=self.user, name='tomato')
-        ingredient2 = sampleIngredient(user=self.user, name='cheese')
+        ingredient1 = sample_ingredient(user=self.user, name='tomato')
+        ingredient2 = sample_ingredient(user=self.user, name='cheese')
         payload = {
             'title': 'Italian pasta',
             'ingredients': [ingredient1.id, ingredient2.id],
@@ -186,9 +164,9 @@ class PrivateRecipeApiTests(TestCase):
     # and should work as expected since no custom logic is written
     def test_partial_recipe_update(self):
         """Test updating a recipe with PATCH"""
-        recipe = sampleRecipe(user=self.user)
-        recipe.tags.add(sampleTag(user=self.user))
-        new_tag = sampleTag(user=self.user, name='Curry')
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(sample_tag(user=self.user))
+        new_tag = sample_tag(user=self.user, name='Curry')
 
         payload = {
             'title': 'Chicken Tikka', 'tags': [new_tag.id]
@@ -208,8 +186,8 @@ class PrivateRecipeApiTests(TestCase):
 
     def test_full_update_recipe(self):
         """Test updating a recipe object PUT"""
-        recipe = sampleRecipe(user=self.user)
-        recipe.tags.add(sampleTag(user=self.user))
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(sample_tag(user=self.user))
         payload = {
             'title': 'Spaghetti carbonara',
             'time_minutes': 25,
@@ -230,17 +208,14 @@ class PrivateRecipeApiTests(TestCase):
 
 
 class RecipeImageUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('ray@test.com')
+        cls.recipe = sample_recipe(user=cls.user)
+
     def setUp(self):
         self.client = APIClient()
-        self.user = get_user_model().objects.create_user(
-            'ray@test.com',
-            'test123'
-        )
         self.client.force_authenticate(self.user)
-        self.recipe = sampleRecipe(user=self.user)
-
-    def tearDown(self):
-        self.recipe.image.delete()
 
     def test_upload_image_to_recipe(self):
         """Test uploading an email to recipe"""
@@ -251,10 +226,11 @@ class RecipeImageUploadTests(TestCase):
             ntf.seek(0)
             res = self.client.post(url, {'image': ntf}, format='multipart')
 
-        self.recipe.refresh_from_db()
+        # A fresh instance, self.recipe is shared by the whole class
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertIn('image', res.data)
-        self.assertTrue(os.path.exists(self.recipe.image.path))
+        self.assertTrue(default_storage.exists(recipe.image.name))
 
     def test_upload_image_bad_request(self):
         """Test uploading an invalid image"""
@@ -265,15 +241,15 @@ class RecipeImageUploadTests(TestCase):
 
     def test_filter_recipes_by_tags(self):
         """Test returning recipes with specific tags"""
-        recipe1 = sampleRecipe(user=self.user, title='Thai vegetable curry')
-        recipe2 = sampleRecipe(user=self.user, title='Aubergine with tahini')
+        recipe1 = sample_recipe(user=self.user, title='Thai vegetable curry')
+        recipe2 = sample_recipe(user=self.user, title='Aubergine with tahini')
 
-        tag1 = sampleTag(user=self.user, name='Vegan')
-        tag2 = sampleTag(user=self.user, name='Vegetarian')
+        tag1 = sample_tag(user=self.user, name='Vegan')
+        tag2 = sample_tag(user=self.user, name='Vegetarian')
 
         recipe1.tags.add(tag1)
         recipe2.tags.add(tag2)
-        recipe3 = sampleRecipe(user=self.user, title='Fish and chips')
+        recipe3 = sample_recipe(user=self.user, title='Fish and chips')
 
         res = self.client.get(
             RECIPES_URL,
@@ -290,13 +266,13 @@ class RecipeImageUploadTests(TestCase):
 
     def test_filter_recipes_by_ingredients(self):
         """Test returning recipes with specific ingredients"""
-        recipe1 = sampleRecipe(user=self.user, title='Posh beans on toast')
-        recipe2 = sampleRecipe(user=self.user, title='Chicken cacciatore')
-        ingredient1 = sampleIngredient(user=self.user, name='Feta cheese')
-        ingredient2 = sampleIngredient(user=self.user, name='Chicken')
+        recipe1 = sample_recipe(user=self.user, title='Posh beans on toast')
+        recipe2 = sample_recipe(user=self.user, title='Chicken cacciatore')
+        ingredient1 = sample_ingredient(user=self.user, name='Feta cheese')
+        ingredient2 = sample_ingredient(user=self.user, name='Chicken')
         recipe1.ingredients.add(ingredient1)
         recipe2.ingredients.add(ingredient2)
-        recipe3 = sampleRecipe(user=self.user, title='Steak and mushrooms')
+        recipe3 = sample_recipe(user=self.user, title='Steak and mushrooms')
 
         res = self.client.get(
             RECIPES_URL,
@@ -309,3 +285,270 @@ class RecipeImageUploadTests(TestCase):
         self.assertIn(serializer1.data, res.data)
         self.assertIn(serializer2.data, res.data)
         self.assertNotIn(serializer3.data, res.data)
+
+
+class RecipeBatchApiTests(TestCase):
+    """Test retrieving many recipe details in one request"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_batch_preserves_order(self):
+        """Test details come back in request order with missing ids"""
+        recipe1 = sample_recipe(user=self.user, title='Pasta')
+        recipe2 = sample_recipe(user=self.user, title='Curry')
+        recipe2.tags.add(sample_tag(user=self.user))
+        recipe2.ingredients.add(sample_ingredient(user=self.user))
+        other = create_user('other@test.com')
+        foreign = sample_recipe(user=other)
+        ids = [recipe2.id, 999999, recipe1.id, foreign.id, recipe2.id]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                BATCH_URL, {'ids': ','.join(str(pk) for pk in ids)}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [
+            RecipeDetailSerializer(recipe2).data,
+            RecipeDetailSerializer(recipe1).data,
+        ])
+        self.assertEqual(res.data['missing'], [999999, foreign.id])
+
+    def test_batch_invalid_ids(self):
+        """Test malformed or too many ids are rejected"""
+        res = self.client.get(BATCH_URL, {'ids': '1,abc'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(
+            BATCH_URL, {'ids': ','.join(str(i) for i in range(1, 500))}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeSparseFieldsApiTests(TestCase):
+    """Test the fields= and expand= query parameters"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.recipe = sample_recipe(user=cls.user)
+        cls.tag = sample_tag(user=cls.user)
+        cls.recipe.tags.add(cls.tag)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_fields(self):
+        """Test only the requested fields are returned"""
+        res = self.client.get(RECIPES_URL, {'fields': 'title,price'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data, [{'title': 'Sample recipe', 'price': '5.00'}]
+        )
+
+    def test_list_expand(self):
+        """Test expand nests tags instead of returning their ids"""
+        res = self.client.get(RECIPES_URL, {'expand': 'tags'})
+
+        self.assertEqual(
+            res.data[0]['tags'], [{'id': self.tag.id, 'name': self.tag.name}]
+        )
+        self.assertEqual(res.data[0]['ingredients'], [])
+
+    def test_detail_fields(self):
+        """Test fields also trims the detail and batch representations"""
+        res = self.client.get(detail_url(self.recipe.id), {'fields': 'tags'})
+        self.assertEqual(
+            res.data, {'tags': [{'id': self.tag.id, 'name': self.tag.name}]}
+        )
+
+        res = self.client.get(
+            BATCH_URL, {'ids': self.recipe.id, 'fields': 'title'}
+        )
+        self.assertEqual(res.data['results'], [{'title': 'Sample recipe'}])
+
+    def test_unknown_fields(self):
+        """Test unknown fields or relations are rejected"""
+        res = self.client.get(RECIPES_URL, {'fields': 'title,secret'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(RECIPES_URL, {'expand': 'user'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeRangeOrderingApiTests(TestCase):
+    """Test the range filter, ordering and cursor parameters"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.quick = sample_recipe(
+            cls.user, title='Quick', time_minutes=10, price=4.00
+        )
+        cls.cheap = sample_recipe(
+            cls.user, title='Cheap', time_minutes=45, price=3.00
+        )
+        cls.roast = sample_recipe(
+            cls.user, title='Roast', time_minutes=90, price=20.00
+        )
+        cls.salad = sample_recipe(
+            cls.user, title='Salad', time_minutes=10, price=8.00
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def titles(self, params):
+        res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['title'] for recipe in res.data]
+
+    def test_range_filters(self):
+        """Test min/max time and price narrow down the list"""
+        self.assertEqual(
+            self.titles({'max_time': 30, 'max_price': '10'}),
+            ['Salad', 'Quick']
+        )
+        self.assertEqual(
+            self.titles({'min_time': 30, 'min_price': '3.50'}), ['Roast']
+        )
+
+    def test_invalid_range(self):
+        """Test non-numeric bounds are rejected"""
+        res = self.client.get(RECIPES_URL, {'max_price': 'cheap'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('max_price', res.data)
+
+    def test_ordering(self):
+        """Test ordering by a column, ties broken on the id"""
+        self.assertEqual(
+            self.titles({'ordering': 'time_minutes'}),
+            ['Quick', 'Salad', 'Cheap', 'Roast']
+        )
+        self.assertEqual(
+            self.titles({'ordering': '-time_minutes'}),
+            ['Roast', 'Cheap', 'Salad', 'Quick']
+        )
+        self.assertEqual(
+            self.titles({'ordering': 'title'}),
+            ['Cheap', 'Quick', 'Roast', 'Salad']
+        )
+        # Unknown orderings fall back to newest first
+        self.assertEqual(
+            self.titles({'ordering': 'user'}),
+            ['Salad', 'Roast', 'Cheap', 'Quick']
+        )
+
+    def test_cursor_pagination(self):
+        """Test paging through an ordering with ties visits every recipe
+        exactly once"""
+        params = {'ordering': 'time_minutes', 'page_size': 1}
+        res = self.client.get(RECIPES_URL, params)
+        titles = []
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            titles += [recipe['title'] for recipe in res.data['results']]
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(titles, ['Quick', 'Salad', 'Cheap', 'Roast'])
+
+
+class RecipeDuplicateApiTests(TestCase):
+    """Test cloning recipes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.tag = sample_tag(user=cls.user)
+        cls.ingredient = sample_ingredient(user=cls.user)
+        cls.recipe = sample_recipe(
+            user=cls.user, image='uploads/recipe/toast.jpg'
+        )
+        cls.recipe.tags.add(cls.tag)
+        cls.recipe.ingredients.add(cls.ingredient)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_duplicate_recipe(self):
+        """Test a copy shares fields, links and the image file"""
+        res = self.client.post(duplicate_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 1)
+        copy = Recipe.objects.get(pk=res.data[0]['id'])
+        self.assertNotEqual(copy.pk, self.recipe.pk)
+        self.assertEqual(copy.title, self.recipe.title)
+        self.assertEqual(copy.image.name, 'uploads/recipe/toast.jpg')
+        self.assertEqual(list(copy.tags.all()), [self.tag])
+        self.assertEqual(list(copy.ingredients.all()), [self.ingredient])
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 2)
+
+    def test_duplicate_public_recipe_private(self):
+        """Test copies of a shared recipe aren't shared"""
+        Recipe.objects.filter(pk=self.recipe.pk).update(is_public=True)
+
+        res = self.client.post(duplicate_url(self.recipe.id), {'copies': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        copies = Recipe.objects.filter(pk__in=[r['id'] for r in res.data])
+        self.assertFalse(copies.filter(is_public=True).exists())
+        self.assertEqual(len(res.data), 2)
+
+    def test_duplicate_many_constant_queries(self):
+        """Test N copies are made with a fixed number of queries"""
+        # Savepoint pair, the source recipe, one INSERT for the copies and
+        # per relation: read the links, INSERT the copies' links, UPDATE
+        # the counts; then the three queries of the list fast path
+        with self.assertNumQueries(13):
+            res = self.client.post(duplicate_url(self.recipe.id), {
+                'copies': 5
+            })
+
+        self.assertEqual(len(res.data), 5)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 6)
+        self.ingredient.refresh_from_db()
+        self.assertEqual(self.ingredient.recipe_count, 6)
+
+    def test_duplicate_copies_amounts(self):
+        """Test ingredient quantities and units are copied too"""
+        RecipeIngredient.objects.filter(recipe=self.recipe).update(
+            quantity=2, unit=Unit.objects.get(name='cup')
+        )
+
+        res = self.client.post(duplicate_url(self.recipe.id))
+
+        link = RecipeIngredient.objects.get(recipe_id=res.data[0]['id'])
+        self.assertEqual(link.quantity, 2)
+        self.assertEqual(link.unit.name, 'cup')
+
+    def test_duplicate_invalid_copies(self):
+        """Test the number of copies is validated"""
+        for copies in (0, 51, 'many'):
+            res = self.client.post(duplicate_url(self.recipe.id), {
+                'copies': copies
+            })
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_duplicate_other_users_recipe(self):
+        """Test recipes of other users can't be duplicated"""
+        other = create_user('other@test.com')
+        recipe = sample_recipe(user=other)
+
+        res = self.client.post(duplicate_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,198 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, RecipeIngredient, Unit
+from core.tests.factories import create_user, sample_recipe
+
+SHOPPING_LIST_URL = reverse('recipe:shopping-list')
+
+
+def amounts_url(recipe_id):
+    """Return the ingredient amounts URL of a recipe"""
+    return reverse('recipe:recipe-ingredient-amounts', args=[recipe_id])
+
+
+class IngredientAmountsApiTests(TestCase):
+    """Test reading and writing ingredient quantities"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.recipe = sample_recipe(cls.user)
+        cls.flour = Ingredient.objects.create(user=cls.user, name='Flour')
+        cls.eggs = Ingredient.objects.create(user=cls.user, name='Eggs')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_put_amounts(self):
+        """Test amounts replace the recipe's ingredients"""
+        self.recipe.ingredients.add(self.eggs)
+
+        res = self.client.put(amounts_url(self.recipe.id), [
+            {'ingredient': self.flour.id, 'quantity': '0.5', 'unit': 'Kg'},
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{
+            'ingredient': self.flour.id,
+            'name': 'Flour',
+            'quantity': '0.500',
+            'unit': 'kg',
+        }])
+        self.assertEqual(list(self.recipe.ingredients.all()), [self.flour])
+        self.eggs.refresh_from_db()
+        self.assertEqual(self.eggs.recipe_count, 0)
+
+    def test_unknown_unit(self):
+        """Test units must be in the unit table"""
+        res = self.client.put(amounts_url(self.recipe.id), [
+            {'ingredient': self.flour.id, 'quantity': 1, 'unit': 'bushel'},
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_users_ingredient(self):
+        """Test ingredients of other users are rejected"""
+        other = create_user('other@test.com')
+        ingredient = Ingredient.objects.create(user=other, name='Salt')
+
+        res = self.client.put(amounts_url(self.recipe.id), [
+            {'ingredient': ingredient.id, 'quantity': 1},
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ids_still_writable(self):
+        """Test recipes can still be linked by ingredient ids only"""
+        res = self.client.patch(
+            reverse('recipe:recipe-detail', args=[self.recipe.id]),
+            {'ingredients': [self.flour.id]}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        link = RecipeIngredient.objects.get(recipe=self.recipe)
+        self.assertIsNone(link.quantity)
+
+
+class ShoppingListApiTests(TestCase):
+    """Test aggregating quantities over several recipes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.flour = Ingredient.objects.create(user=cls.user, name='Flour')
+        cls.eggs = Ingredient.objects.create(user=cls.user, name='Eggs')
+        cls.bread = sample_recipe(cls.user, title='Bread')
+        cls.cake = sample_recipe(cls.user, title='Cake')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add(self, recipe, ingredient, quantity, unit=None):
+        RecipeIngredient.objects.create(
+            recipe=recipe, ingredient=ingredient, quantity=quantity,
+            unit=Unit.objects.get(name=unit) if unit else None
+        )
+
+    def test_shopping_list(self):
+        """Test quantities are converted and summed per ingredient"""
+        self.add(self.bread, self.flour, '0.5', 'kg')
+        self.add(self.cake, self.flour, 200, 'g')
+        self.add(self.cake, self.eggs, 3)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(SHOPPING_LIST_URL, {
+                'ids': f'{self.bread.id},{self.cake.id}'
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'ingredient': self.eggs.id, 'name': 'Eggs',
+             'quantity': '3', 'unit': None, 'recipes': 1, 'occurrences': 1},
+            {'ingredient': self.flour.id, 'name': 'Flour',
+             'quantity': '700', 'unit': 'g', 'recipes': 2, 'occurrences': 2},
+        ])
+
+    def test_incompatible_units(self):
+        """Test units with different bases are listed separately"""
+        self.add(self.bread, self.flour, 1, 'cup')
+        self.add(self.cake, self.flour, 100, 'g')
+
+        res = self.client.get(SHOPPING_LIST_URL, {
+            'ids': f'{self.bread.id},{self.cake.id}'
+        })
+
+        self.assertEqual(
+            [(row['quantity'], row['unit']) for row in res.data],
+            [('100', 'g'), ('240', 'ml')]
+        )
+
+    def test_other_users_recipes_ignored(self):
+        """Test only the user's own recipes are included"""
+        other = create_user('other@test.com')
+        recipe = sample_recipe(other)
+        salt = Ingredient.objects.create(user=other, name='Salt')
+        self.add(recipe, salt, 1, 'g')
+
+        res = self.client.get(SHOPPING_LIST_URL, {'ids': recipe.id})
+
+        self.assertEqual(res.data, [])
+
+    def test_invalid_ids(self):
+        """Test malformed id lists are rejected"""
+        res = self.client.get(SHOPPING_LIST_URL, {'ids': '1,x'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_meal_plan_repeats(self):
+        """Test a recipe planned twice counts twice"""
+        self.add(self.bread, self.flour, 500, 'g')
+        self.add(self.cake, self.flour, 200, 'g')
+
+        res = self.client.get(SHOPPING_LIST_URL, {
+            'ids': f'{self.bread.id},{self.cake.id},{self.bread.id}'
+        })
+
+        self.assertEqual(res.data[0]['quantity'], '1200')
+        self.assertEqual(res.data[0]['recipes'], 2)
+        self.assertEqual(res.data[0]['occurrences'], 3)
+
+    def test_cached_by_sorted_ids(self):
+        """Test the same plan in another order is served from the cache"""
+        self.add(self.bread, self.flour, 500, 'g')
+        self.client.get(SHOPPING_LIST_URL, {
+            'ids': f'{self.bread.id},{self.cake.id}'
+        })
+
+        with self.assertNumQueries(0):
+            res = self.client.get(SHOPPING_LIST_URL, {
+                'ids': f'{self.cake.id},{self.bread.id}'
+            })
+
+        self.assertEqual(res.data[0]['quantity'], '500')
+
+    def test_invalidated_on_write(self):
+        """Test new amounts and renames show up in cached lists"""
+        self.add(self.bread, self.flour, 500, 'g')
+        self.client.get(SHOPPING_LIST_URL, {'ids': self.bread.id})
+
+        self.client.put(amounts_url(self.bread.id), [
+            {'ingredient': self.flour.id, 'quantity': 1, 'unit': 'kg'},
+        ], format='json')
+        res = self.client.get(SHOPPING_LIST_URL, {'ids': self.bread.id})
+        self.assertEqual(res.data[0]['quantity'], '1000')
+
+        # Saved through a fresh instance, self.flour is shared by the class
+        flour = Ingredient.objects.get(pk=self.flour.pk)
+        flour.name = 'Rye flour'
+        flour.save()
+        res = self.client.get(SHOPPING_LIST_URL, {'ids': self.bread.id})
+        self.assertEqual(res.data[0]['name'], 'Rye flour')
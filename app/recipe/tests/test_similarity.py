@@ -0,0 +1,94 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient
+from core.tests.factories import create_user, sample_recipe
+from recipe import similarity
+
+
+def similar_url(recipe_id):
+    """Return the similar recipes URL of a recipe"""
+    return reverse('recipe:recipe-similar', args=[recipe_id])
+
+
+class SimilarRecipesApiTests(TestCase):
+    """Test ranking recipes by tag and ingredient overlap"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.vegan = Tag.objects.create(user=cls.user, name='Vegan')
+        cls.quick = Tag.objects.create(user=cls.user, name='Quick')
+        cls.tofu = Ingredient.objects.create(user=cls.user, name='Tofu')
+        cls.recipe = sample_recipe(
+            cls.user, title='Tofu bowl', tags=[cls.vegan, cls.quick],
+            ingredients=[cls.tofu]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_similar_recipes(self):
+        """Test recipes are ranked by Jaccard similarity"""
+        same = sample_recipe(
+            self.user, title='Tofu wrap', tags=[self.vegan, self.quick],
+            ingredients=[self.tofu]
+        )
+        partial = sample_recipe(
+            self.user, title='Salad', tags=[self.vegan]
+        )
+        sample_recipe(self.user, title='Steak')
+
+        # get_object, the similarity query and the list fast path
+        with self.assertNumQueries(5):
+            res = self.client.get(similar_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(recipe['id'], recipe['similarity']) for recipe in res.data],
+            [(same.id, 1.0), (partial.id, 0.3333)]
+        )
+        self.assertEqual(res.data[0]['title'], 'Tofu wrap')
+
+    def test_limit(self):
+        """Test limit caps the number of results"""
+        for i in range(3):
+            sample_recipe(self.user, title=f'Bowl {i}', tags=[self.vegan])
+
+        res = self.client.get(similar_url(self.recipe.id), {'limit': 2})
+        self.assertEqual(len(res.data), 2)
+
+        res = self.client.get(similar_url(self.recipe.id), {'limit': 0})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_users_recipes_excluded(self):
+        """Test other users' recipes are never suggested"""
+        other = create_user('other@test.com')
+        sample_recipe(
+            other, title='Copycat', tags=[self.vegan, self.quick]
+        )
+
+        res = self.client.get(similar_url(self.recipe.id))
+
+        self.assertEqual(res.data, [])
+
+    def test_pool_only_holds_own_recipes(self):
+        """Test other users' closer recipes don't fill the candidate pool"""
+        other = create_user('other@test.com')
+        sample_recipe(
+            other, title='Copycat', tags=[self.vegan, self.quick],
+            ingredients=[self.tofu]
+        )
+        salad = sample_recipe(self.user, title='Salad', tags=[self.vegan])
+
+        with patch.object(similarity, 'MIN_CANDIDATE_POOL', 1), \
+                patch.object(similarity, 'CANDIDATE_POOL_FACTOR', 1):
+            res = self.client.get(similar_url(self.recipe.id), {'limit': 1})
+
+        self.assertEqual([recipe['id'] for recipe in res.data], [salad.id])
@@ -0,0 +1,112 @@
+from django.core.cache import cache
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient
+from core.tests.factories import create_user, sample_recipe
+
+STATS_URL = reverse('recipe:stats')
+
+
+class PublicStatsApiTests(TestCase):
+    """Test unauthenticated stats API access"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_login_required(self):
+        """Test that login is required to access stats"""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateStatsApiTests(TestCase):
+    """Test authenticated stats API access"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_empty_stats(self):
+        """Test stats for a user without recipes"""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 0)
+        self.assertIsNone(res.data['average_time_minutes'])
+        self.assertIsNone(res.data['price']['average'])
+        self.assertEqual(res.data['top_tags'], [])
+
+    def test_stats_values(self):
+        """Test counts, averages, price buckets and top tags"""
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        quick = Tag.objects.create(user=self.user, name='Quick')
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        recipe1 = sample_recipe(self.user, time_minutes=10, price=4.00)
+        recipe2 = sample_recipe(self.user, time_minutes=20, price=12.00)
+        recipe1.tags.add(vegan, quick)
+        recipe2.tags.add(vegan)
+        recipe2.ingredients.add(salt)
+
+        other = create_user('other@test.com')
+        sample_recipe(other, time_minutes=100, price=99.00)
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['recipe_count'], 2)
+        self.assertEqual(res.data['average_time_minutes'], 15)
+        self.assertEqual(res.data['price']['min'], '4.00')
+        self.assertEqual(res.data['price']['max'], '12.00')
+        self.assertEqual(res.data['price']['average'], '8.00')
+        distribution = {
+            bucket['range']: bucket['recipe_count']
+            for bucket in res.data['price']['distribution']
+        }
+        self.assertEqual(distribution['0-5'], 1)
+        self.assertEqual(distribution['10-20'], 1)
+        self.assertEqual(distribution['50+'], 0)
+        self.assertEqual(res.data['top_tags'], [
+            {'id': vegan.id, 'name': 'Vegan', 'recipe_count': 2},
+            {'id': quick.id, 'name': 'Quick', 'recipe_count': 1},
+        ])
+        self.assertEqual(res.data['top_ingredients'], [
+            {'id': salt.id, 'name': 'Salt', 'recipe_count': 1},
+        ])
+
+    def test_stats_cached(self):
+        """Test repeated requests are served from the cache"""
+        sample_recipe(self.user)
+
+        with self.assertNumQueries(3):
+            self.client.get(STATS_URL)
+        with self.assertNumQueries(0):
+            res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['recipe_count'], 1)
+
+    def test_stats_invalidated_on_write(self):
+        """Test creating recipes and linking tags refreshes the stats"""
+        recipe = sample_recipe(self.user)
+        self.client.get(STATS_URL)
+
+        sample_recipe(self.user)
+        res = self.client.get(STATS_URL)
+        self.assertEqual(res.data['recipe_count'], 2)
+
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        recipe.tags.add(tag)
+        res = self.client.get(STATS_URL)
+        self.assertEqual(res.data['top_tags'][0]['name'], 'Dinner')
+
+        recipe.delete()
+        res = self.client.get(STATS_URL)
+        self.assertEqual(res.data['recipe_count'], 1)
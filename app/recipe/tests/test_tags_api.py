@@ -1,4 +1,3 @@
-from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import TestCase
 
@@ -6,7 +5,8 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Tag, Recipe
-from recipe.serializers import TagSerializer
+from core.tests.factories import create_user
+from recipe.serializers import TagSerializer, TagCountSerializer
 
 TAGS_URL = reverse('recipe:tag-list')
 
@@ -27,11 +27,11 @@ class PublicTagsApiTests(TestCase):
 class PrivateTagsApiTests(TestCase):
     """Test the authorized user tags API"""
 
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+
     def setUp(self):
-        self.user = get_user_model().objects.create_user(
-            'raymond@test.com',
-            'test123'
-        )
         self.client = APIClient()
         self.client.force_authenticate(self.user)
 
@@ -51,10 +51,7 @@ class PrivateTagsApiTests(TestCase):
 
     def test_tags_limited_to_user(self):
         """Test that tags returned are for authenticated user"""
-        user2 = get_user_model().objects.create_user(
-            'other@user.com',
-            'test123'
-        )
+        user2 = create_user('other@user.com')
         Tag.objects.create(user=user2, name='Fruity')
 
         tag = Tag.objects.create(user=self.user, name='Comfort Food')
@@ -124,3 +121,35 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
         self.assertEqual(len(res.data), 1)
+
+    def test_retrieve_tags_with_counts(self):
+        """Test with_counts=1 adds recipe counts and popularity ordering"""
+        tag1 = Tag.objects.create(user=self.user, name='Breakfast')
+        tag2 = Tag.objects.create(user=self.user, name='Lunch')
+        for title in ('Pancakes', 'Porridge'):
+            recipe = Recipe.objects.create(
+                title=title,
+                time_minutes=5,
+                price=3.00,
+                user=self.user
+            )
+            recipe.tags.add(tag1)
+
+        res = self.client.get(
+            TAGS_URL, {'with_counts': 1, 'ordering': '-recipe_count'}
+        )
+
+        tags = Tag.objects.filter(pk__in=[tag1.pk, tag2.pk]) \
+            .order_by('-recipe_count')
+        serializer = TagCountSerializer(tags, many=True)
+        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data[0]['recipe_count'], 2)
+        self.assertEqual(res.data[1]['recipe_count'], 0)
+
+    def test_retrieve_tags_without_counts(self):
+        """Test recipe counts are only returned when asked for"""
+        Tag.objects.create(user=self.user, name='Breakfast')
+
+        res = self.client.get(TAGS_URL, {'ordering': 'bogus'})
+
+        self.assertNotIn('recipe_count', res.data[0])
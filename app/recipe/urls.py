@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from core.middleware import bypass_middleware
 from recipe import views
 
 router = DefaultRouter()
@@ -12,5 +13,11 @@ router.register('recipes', views.RecipeViewSet)
 app_name = 'recipe'
 
 urlpatterns = [
+    path('stats/', views.RecipeStatsView.as_view(), name='stats'),
+    path('shopping-list/', views.ShoppingListView.as_view(),
+         name='shopping-list'),
+    path('public/recipes/<int:pk>/',
+         bypass_middleware(views.PublicRecipeView.as_view()),
+         name='public-recipe'),
     path('', include(router.urls)),
 ]
@@ -1,20 +1,82 @@
+import hashlib
+
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
+from django.utils.cache import get_conditional_response, \
+    patch_cache_control
+from django.core.exceptions import ValidationError
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated
+from rest_framework import viewsets, mixins, status, exceptions, \
+    fields as api_fields
+from rest_framework.views import APIView
+from rest_framework.permissions import AllowAny, IsAuthenticated
+
+from core.authentication import ExpiringTokenAuthentication, \
+    SignedTokenAuthentication
+from core.models import Tag, Ingredient, Recipe, RecipeIngredient
+from core.renderers import FastJSONRenderer
+
+from recipe import fastpath, serializers
+from recipe.catalog import search_catalog
+from recipe.dedupe import get_or_create_named
+from recipe.duplicate import duplicate_recipe
+from recipe.filters import StableOrderingFilter
+from recipe.pagination import OptionalCursorPagination
+from recipe.pantry import cookable_recipes
+from recipe.shopping import shopping_list
+from recipe.similarity import similar_recipes
+from recipe.stats import get_stats, invalidate_stats
+
+
+class FastListMixin:
+    """Serve unpaginated list requests through a lean read-only path"""
+    # Set to False on a viewset to always use the regular serializer
+    fast_list = True
+
+    def serialize_list(self, queryset):
+        """Return the list representation of queryset as plain data,
+        rendered by the regular serializer unless a viewset overrides it"""
+        return self.get_serializer(queryset, many=True).data
+
+    def _has_fast_list(self):
+        """Return True if the viewset has its own serialize_list()"""
+        return self.fast_list and \
+            type(self).serialize_list is not FastListMixin.serialize_list
 
-from core.models import Tag, Ingredient, Recipe
+    def list(self, request, *args, **kwargs):
+        if not self._has_fast_list():
+            return super().list(request, *args, **kwargs)
 
-from recipe import serializers
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
 
+        return Response(self.serialize_list(queryset))
 
-class BaseViewSet(viewsets.GenericViewSet,
+
+class BaseViewSet(FastListMixin,
+                  viewsets.GenericViewSet,
                   mixins.ListModelMixin,
                   mixins.CreateModelMixin):
     """Parent ViewSet with overriden functions"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (ExpiringTokenAuthentication,
+                              SignedTokenAuthentication)
     permission_classes = (IsAuthenticated,)
+    # Serializer used for list requests with with_counts=1
+    count_serializer_class = None
+    # Values accepted by the ordering query parameter, anything else
+    # falls back to the first one
+    orderings = ('-name', 'name', '-recipe_count', 'recipe_count')
+
+    def _with_counts(self):
+        """Return True if the client asked for recipe counts"""
+        return self.action == 'list' and bool(
+            int(self.request.query_params.get('with_counts', 0))
+        )
 
     def get_queryset(self):
         """Return objects for the current authenticated user only"""
@@ -22,43 +84,166 @@ class BaseViewSet(viewsets.GenericViewSet,
         assigned_only = bool(
             int(self.request.query_params.get('assigned_only', 0))
         )
+        ordering = self.request.query_params.get('ordering')
+        if ordering not in self.orderings:
+            ordering = self.orderings[0]
+
         queryset = self.queryset
         if assigned_only:
             # TODO: How does the filter connect to the Tag/Ingredient?
-            queryset = queryset.filter(recipe__isnull=False)
-        # queryset can return multiple matching entries, so use distinct()
+            # The join can return multiple matching entries, so use
+            # distinct()
+            queryset = queryset.filter(recipe__isnull=False).distinct()
+        # recipe_count orderings are served by the (user, -recipe_count)
+        # index; name breaks ties so pages are stable
         return queryset.filter(
             user=self.request.user
-        ).order_by('-name').distinct()
+        ).order_by(ordering, '-name')
 
-    def perform_create(self, serializer):
-        """Create a new object"""
-        serializer.save(user=self.request.user)
+    def get_serializer_class(self):
+        """Return the count serializer when with_counts=1 is passed"""
+        if self._with_counts():
+            return self.count_serializer_class
+
+        return self.serializer_class
+
+    def serialize_list(self, queryset):
+        """Return id/name pairs straight from the database"""
+        if self._with_counts():
+            return fastpath.serialize_names(
+                queryset, ('id', 'name', 'recipe_count')
+            )
+
+        return fastpath.serialize_names(queryset)
+
+    def create(self, request, *args, **kwargs):
+        """Create a new object, or return the user's existing one with the
+        same name (ignoring case) with 200 instead of 201"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        instance, created = get_or_create_named(
+            self.queryset.model,
+            request.user,
+            serializer.validated_data['name']
+        )
+
+        return Response(
+            self.get_serializer(instance).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    # GET api/recipe/tags/catalog/?search=veg suggests names from the
+    # catalog shared by all users, served from the catalog cache
+    @action(methods=['GET'], detail=False)
+    def catalog(self, request):
+        """Return shared catalog entries whose name starts with search"""
+        return Response(search_catalog(
+            self.queryset.model, request.query_params.get('search', '')
+        ))
 
 
 class TagViewSet(BaseViewSet):
     """Manage tags in the database"""
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    count_serializer_class = serializers.TagCountSerializer
 
 
 class IngredientViewSet(BaseViewSet):
     """Manage Ingredients in the database"""
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    count_serializer_class = serializers.IngredientCountSerializer
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(FastListMixin, viewsets.ModelViewSet):
     """Manage recipes in the database"""
     queryset = Recipe.objects.all()
     serializer_class = serializers.RecipeSerializer
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (ExpiringTokenAuthentication,
+                              SignedTokenAuthentication)
     permission_classes = (IsAuthenticated,)
+    # ordering= accepts these columns, each optionally prefixed with '-'.
+    # Time and price orderings are served by the (user, column, id)
+    # indexes, the filter appends id to every ordering
+    filter_backends = (StableOrderingFilter,)
+    ordering_fields = ('time_minutes', 'price', 'title')
+    ordering = ('-id',)
+    # Opt-in with ?cursor= or ?page_size=, plain lists otherwise
+    pagination_class = OptionalCursorPagination
+    # Query parameter -> (lookup, field parsing its value)
+    range_filters = {
+        'min_time': ('time_minutes__gte', api_fields.IntegerField()),
+        'max_time': ('time_minutes__lte', api_fields.IntegerField()),
+        'min_price': ('price__gte', api_fields.DecimalField(None, None)),
+        'max_price': ('price__lte', api_fields.DecimalField(None, None)),
+    }
+    # Actions whose detail representation is built by the database in a
+    # single query (see fastpath.serialize_recipe_details) instead of
+    # loading tags and ingredients through RecipeDetailSerializer
+    aggregate_actions = ('retrieve', 'batch')
+    # Upper bound on the number of ids accepted by the batch action
+    batch_max_ids = 100
+    # Actions honouring the fields= and expand= query parameters
+    sparse_actions = ('list', 'retrieve', 'batch')
+    # Upper bound on the copies made by one duplicate request
+    duplicate_max_copies = 50
+    # Default and maximum number of results of the similar action
+    similar_limit = 10
+    similar_max_limit = 50
+    # Maximum number of results of the pantry action
+    pantry_max_results = 100
 
     def _params_to_ints(self, qs):
         """Convert a list of string IDs to a list of integers"""
         return [int(str_id) for str_id in qs.split(',')]
 
+    def _params_to_names(self, param, allowed):
+        """Return the comma separated names in a query parameter,
+        rejecting any that aren't in allowed"""
+        value = self.request.query_params.get(param)
+        if not value:
+            return None
+
+        names = tuple(name for name in value.split(',') if name)
+        unknown = sorted(set(names) - set(allowed))
+        if unknown:
+            raise exceptions.ValidationError(
+                {param: [f'Unknown field(s): {", ".join(unknown)}.']}
+            )
+
+        return names
+
+    def _range_lookups(self):
+        """Return the filter() kwargs of the min_/max_ query parameters"""
+        lookups = {}
+        for param, (lookup, field) in self.range_filters.items():
+            value = self.request.query_params.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                lookups[lookup] = field.to_internal_value(value)
+            except exceptions.ValidationError as exc:
+                raise exceptions.ValidationError({param: exc.detail})
+
+        return lookups
+
+    def _requested_fields(self):
+        """Return the fields asked for with fields=, or None for all"""
+        if self.action not in self.sparse_actions:
+            return None
+        return self._params_to_names(
+            'fields', serializers.RecipeSerializer.Meta.fields
+        )
+
+    def _requested_expand(self):
+        """Return the relations to render as nested objects"""
+        if self.action in ('retrieve', 'batch'):
+            return fastpath.RELATIONS  # details are always expanded
+        if self.action not in self.sparse_actions:
+            return ()
+        return self._params_to_names('expand', fastpath.RELATIONS) or ()
+
     def get_queryset(self):
         """Retrieve the recipes for the authenticated user"""
         tags = self.request.query_params.get('tags')
@@ -71,25 +256,251 @@ class RecipeViewSet(viewsets.ModelViewSet):
             ingredient_ids = self._params_to_ints(ingredients)
             queryset = queryset.filter(ingredients__id__in=ingredient_ids)
 
-        return queryset.filter(user=self.request.user)
+        queryset = queryset.filter(
+            user=self.request.user, **self._range_lookups()
+        ).order_by('-id')
+
+        if self.action in self.sparse_actions:
+            # Only load the columns and relations that will be rendered,
+            # the fast paths pick their own columns with values()
+            fields = self._requested_fields() or \
+                serializers.RecipeSerializer.Meta.default_fields
+            relations = [name for name in fastpath.RELATIONS
+                         if name in fields]
+            columns = [name for name in fields if name not in relations]
+            queryset = queryset.only('id', *columns) \
+                .prefetch_related(*relations)
+
+        return queryset
 
     # This overrides the default behaviour of returning the standard
     # serializer_class field set above
     def get_serializer_class(self):
         """Return appropriate serializer class"""
-        if self.action == 'retrieve':
+        if self.action in ('retrieve', 'batch'):
             return serializers.RecipeDetailSerializer
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
+        elif self.action == 'ingredient_amounts':
+            return serializers.RecipeIngredientSerializer
 
         return self.serializer_class
 
+    def get_serializer(self, *args, **kwargs):
+        """Pass the requested fields and expansions to the serializer"""
+        if self.action in self.sparse_actions:
+            kwargs.setdefault('fields', self._requested_fields())
+            kwargs.setdefault('expand', self._requested_expand())
+
+        return super().get_serializer(*args, **kwargs)
+
+    def serialize_list(self, queryset):
+        """Return recipes with aggregated ingredient and tag ids"""
+        return fastpath.serialize_recipes(
+            queryset,
+            self._requested_fields(),
+            self._requested_expand(),
+            self.get_serializer_context()
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return a recipe detail, aggregated in the database if enabled"""
+        if self.action not in self.aggregate_actions:
+            return super().retrieve(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            data = fastpath.serialize_recipe_details(
+                queryset.filter(pk=kwargs['pk']),
+                self._requested_fields(),
+                self.get_serializer_context()
+            )
+        except (TypeError, ValueError, ValidationError):
+            data = None  # malformed pk, same as get_object_or_404
+        if not data:
+            raise Http404
+
+        return Response(data[0])
+
+    # GET api/recipe/recipes/batch/?ids=3,1,2 returns the details of many
+    # recipes in one round trip with a constant number of queries
+    @action(methods=['GET'], detail=False)
+    def batch(self, request):
+        """Return recipe details for a list of ids, in request order"""
+        try:
+            ids = self._params_to_ints(request.query_params.get('ids', ''))
+        except ValueError:
+            return Response(
+                {'ids': ['Expected a comma separated list of ids.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        ids = list(dict.fromkeys(ids))  # drop duplicates, keep order
+        if len(ids) > self.batch_max_ids:
+            return Response(
+                {'ids': [f'At most {self.batch_max_ids} ids are allowed.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            pk__in=ids
+        )
+        # The id is needed to put results in request order, even when
+        # fields= leaves it out of the response
+        fields = self._requested_fields()
+        strip_id = fields is not None and 'id' not in fields
+        if strip_id:
+            fields += ('id',)
+
+        if self.action in self.aggregate_actions:
+            recipes = fastpath.serialize_recipe_details(
+                queryset, fields, self.get_serializer_context()
+            )
+        else:
+            recipes = self.get_serializer(
+                queryset, many=True, fields=fields
+            ).data
+        by_id = {recipe['id']: recipe for recipe in recipes}
+        if strip_id:
+            for recipe in recipes:
+                del recipe['id']
+
+        # Recipes of other users are reported as missing so the response
+        # doesn't reveal which ids exist
+        return Response({
+            'results': [by_id[pk] for pk in ids if pk in by_id],
+            'missing': [pk for pk in ids if pk not in by_id],
+        })
+
+    # POST api/recipe/recipes/1/duplicate/ with an optional {"copies": n}
+    # clones a recipe without re-validating its tags and ingredients
+    @action(methods=['POST'], detail=True)
+    def duplicate(self, request, pk=None):
+        """Create copies of a recipe and return them"""
+        copies = request.data.get('copies', 1)
+        try:
+            copies = int(copies)
+        except (TypeError, ValueError):
+            copies = 0
+        if not 1 <= copies <= self.duplicate_max_copies:
+            return Response(
+                {'copies': [
+                    'Expected a number between 1 and '
+                    f'{self.duplicate_max_copies}.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        new_recipes = duplicate_recipe(self.get_object(), copies)
+        data = fastpath.serialize_recipes(
+            Recipe.objects.filter(
+                pk__in=[recipe.pk for recipe in new_recipes]
+            ).order_by('id'),
+            context=self.get_serializer_context()
+        )
+
+        return Response(data, status=status.HTTP_201_CREATED)
+
     def perform_create(self, serializer):
         """Create a new recipe"""
         # perform_create method knows how to create an object from the
         # assigned model when a POST request is made to this ViewSet.
         serializer.save(user=self.request.user)
 
+    # GET api/recipe/recipes/pantry/?ingredients=1,2,3&max_missing=1 lists
+    # the recipes that can be cooked with ingredients 1, 2 and 3 plus at
+    # most one more
+    @action(methods=['GET'], detail=False)
+    def pantry(self, request):
+        """Return recipes mostly covered by a list of ingredients"""
+        try:
+            pantry_ids = [
+                int(str_id) for str_id in
+                request.query_params.get('ingredients', '').split(',')
+                if str_id
+            ]
+            max_missing = int(request.query_params.get('max_missing', 0))
+        except ValueError:
+            return Response(
+                {'ingredients': [
+                    'Expected a comma separated list of ids and an '
+                    'integer max_missing.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ranked = list(cookable_recipes(
+            request.user, pantry_ids, max_missing
+        )[:self.pantry_max_results])
+        recipes = fastpath.serialize_recipes(
+            Recipe.objects.filter(pk__in=[pk for pk, _ in ranked]),
+            context=self.get_serializer_context()
+        )
+        by_id = {recipe['id']: recipe for recipe in recipes}
+        for pk, missing in ranked:
+            by_id[pk]['missing'] = missing
+
+        return Response([by_id[pk] for pk, _ in ranked])
+
+    # GET api/recipe/recipes/1/similar/?limit=5 suggests the user's recipes
+    # sharing the most tags and ingredients with recipe 1
+    @action(methods=['GET'], detail=True)
+    def similar(self, request, pk=None):
+        """Return recipes ranked by tag and ingredient overlap"""
+        try:
+            limit = int(request.query_params.get('limit', self.similar_limit))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= self.similar_max_limit:
+            return Response(
+                {'limit': [
+                    'Expected a number between 1 and '
+                    f'{self.similar_max_limit}.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        scores = similar_recipes(self.get_object(), limit)
+        recipes = fastpath.serialize_recipes(
+            Recipe.objects.filter(pk__in=[pk for pk, _ in scores]),
+            context=self.get_serializer_context()
+        )
+        by_id = {recipe['id']: recipe for recipe in recipes}
+        for pk, score in scores:
+            by_id[pk]['similarity'] = round(score, 4)
+
+        return Response([by_id[pk] for pk, _ in scores])
+
+    # GET/PUT api/recipe/recipes/1/ingredient-amounts/ reads or replaces
+    # the recipe's ingredients together with their quantities and units
+    @action(methods=['GET', 'PUT'], detail=True,
+            url_path='ingredient-amounts')
+    def ingredient_amounts(self, request, pk=None):
+        """List or replace the ingredient quantities of a recipe"""
+        recipe = self.get_object()
+        if request.method == 'PUT':
+            serializer = self.get_serializer(data=request.data, many=True)
+            serializer.is_valid(raise_exception=True)
+            amounts = {
+                row['ingredient'].pk: row
+                for row in serializer.validated_data
+            }
+            with transaction.atomic():
+                # set() keeps recipe counts up to date through signals
+                recipe.ingredients.set(list(amounts))
+                links = list(RecipeIngredient.objects.filter(recipe=recipe))
+                for link in links:
+                    link.quantity = amounts[link.ingredient_id].get('quantity')
+                    link.unit = amounts[link.ingredient_id].get('unit')
+                RecipeIngredient.objects.bulk_update(
+                    links, ['quantity', 'unit']
+                )
+            # bulk_update() sends no signals, amounts feed shopping lists
+            invalidate_stats(request.user.pk)
+
+        links = RecipeIngredient.objects.filter(recipe=recipe) \
+            .select_related('ingredient', 'unit').order_by('ingredient__name')
+        return Response(self.get_serializer(links, many=True).data)
+
     # @action is a way of defining custom funtionalities within a ViewSet other
     # than the already built in CRUD functions that come with ViewSets.
     # detail=True means this custom action is only works in the detail view
@@ -116,3 +527,88 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
+
+
+class RecipeStatsView(APIView):
+    """Return aggregate stats about the authenticated user's recipes"""
+    authentication_classes = (ExpiringTokenAuthentication,
+                              SignedTokenAuthentication)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        return Response(get_stats(request.user))
+
+
+class ShoppingListView(APIView):
+    """Return the ingredients needed for a meal plan.
+
+    ids lists the planned recipes, repeated for every time they are
+    cooked, e.g. ?ids=3,5,3 for recipe 3 twice and recipe 5 once.
+    """
+    authentication_classes = (ExpiringTokenAuthentication,
+                              SignedTokenAuthentication)
+    permission_classes = (IsAuthenticated,)
+    # Upper bound on the number of recipe ids accepted
+    max_ids = 100
+
+    def get(self, request):
+        try:
+            ids = [
+                int(str_id)
+                for str_id in request.query_params.get('ids', '').split(',')
+            ]
+        except ValueError:
+            return Response(
+                {'ids': ['Expected a comma separated list of ids.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(ids) > self.max_ids:
+            return Response(
+                {'ids': [f'At most {self.max_ids} ids are allowed.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(shopping_list(request.user, ids))
+
+
+class PublicRecipeView(APIView):
+    """Serve a shared recipe to anyone.
+
+    Routed through BypassMiddleware, so neither sessions nor
+    authentication run. Responses carry Cache-Control: public and a
+    strong ETag of the body, letting browsers and CDNs cache them and
+    revalidate with If-None-Match.
+    """
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+    # A single representation, so caches need not vary on Accept
+    renderer_classes = (FastJSONRenderer,)
+    fields = ('id', 'title', 'time_minutes', 'price', 'ingredients',
+              'tags', 'link', 'image')
+
+    def get(self, request, pk):
+        data = fastpath.serialize_recipe_details(
+            Recipe.objects.filter(pk=pk, is_public=True),
+            self.fields,
+            {'request': request}
+        )
+        if not data:
+            raise Http404
+
+        return Response(data[0])
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if response.status_code != status.HTTP_200_OK:
+            return response
+
+        response.render()
+        etag = '"{}"'.format(hashlib.sha1(response.content).hexdigest())
+        response['ETag'] = etag
+        patch_cache_control(
+            response, public=True, max_age=settings.PUBLIC_RECIPE_MAX_AGE
+        )
+
+        return get_conditional_response(request, etag=etag, response=response)
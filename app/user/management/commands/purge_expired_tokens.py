@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+
+class Command(BaseCommand):
+    """Django command to delete API tokens older than TOKEN_TTL"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=settings.TOKEN_TTL)
+        expired = Token.objects.filter(created__lt=cutoff)
+
+        # Delete in batches (served by the index on created) so a large
+        # backlog never holds one long-running lock on the table
+        purged = 0
+        while True:
+            keys = list(
+                expired.values_list('key', flat=True)[:options['batch_size']]
+            )
+            if not keys:
+                break
+            purged += Token.objects.filter(key__in=keys).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} token(s)'))
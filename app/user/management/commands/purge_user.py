@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from user.purge import DEFAULT_BATCH_SIZE, purge_recipes, purge_user
+
+
+class Command(BaseCommand):
+    """Django command to delete user accounts and everything they own"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('emails', nargs='+')
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--recipes-only', action='store_true',
+            help='Delete the recipes but keep the account'
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.filter(email__in=options['emails'])
+        missing = set(options['emails']) - {user.email for user in users}
+        if missing:
+            raise CommandError(
+                f"Unknown user(s): {', '.join(sorted(missing))}"
+            )
+
+        for user in users:
+            if options['recipes_only']:
+                deleted = {
+                    'recipes': purge_recipes(user, options['batch_size'])
+                }
+            else:
+                deleted = purge_user(user, options['batch_size'])
+            summary = ', '.join(
+                f'{count} {name}' for name, count in deleted.items()
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f'Purged {user.email}: {summary}')
+            )
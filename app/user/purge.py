@@ -0,0 +1,135 @@
+import logging
+
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Count
+
+from core.authentication import revoke_user_tokens
+from core.models import Tag, Ingredient, Recipe
+from recipe.counters import COUNTED_FIELDS, adjust_counts
+from recipe.stats import invalidate_stats
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _delete_in(model, column, ids):
+    """DELETE the rows of model whose column is in ids, without loading
+    them or sending signals"""
+    sql = 'DELETE FROM {} WHERE {} IN ({})'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        connection.ops.quote_name(column),
+        ', '.join(['%s'] * len(ids))
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, list(ids))
+        return cursor.rowcount
+
+
+def remove_files(names):
+    """Delete stored files, logging rather than raising on failure"""
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError:
+            logger.warning('Could not remove %s', name, exc_info=True)
+
+
+def _release_counts(recipe_ids):
+    """Decrement recipe_count of every tag and ingredient linked to the
+    given recipes, whoever owns it"""
+    for model, field_name in COUNTED_FIELDS.items():
+        column = f'{model._meta.model_name}_id'  # tag -> tag_id
+        through = getattr(Recipe, field_name).through
+        rows = through.objects.filter(recipe_id__in=recipe_ids).values(
+            column
+        ).annotate(links=Count('*')).values_list(column, 'links')
+        by_delta = {}
+        for related_id, links in rows:
+            by_delta.setdefault(links, []).append(related_id)
+        for links, ids in by_delta.items():
+            adjust_counts(model, ids, -links)
+
+
+def purge_recipes(user, batch_size=DEFAULT_BATCH_SIZE):
+    """Delete all of user's recipes in chunked transactions.
+
+    Each chunk deletes the M2M links and the recipes with one set-based
+    statement per table. Image files are removed once the chunk's
+    transaction has committed. Returns the number of recipes deleted.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Recipe.objects.filter(user=user).order_by('pk')
+                .values_list('pk', 'image')[:batch_size]
+            )
+            if not rows:
+                break
+            recipe_ids = [pk for pk, _ in rows]
+            images = [image for _, image in rows if image]
+
+            _release_counts(recipe_ids)
+            for field_name in COUNTED_FIELDS.values():
+                through = getattr(Recipe, field_name).through
+                _delete_in(through, 'recipe_id', recipe_ids)
+            deleted += _delete_in(Recipe, 'id', recipe_ids)
+
+            if images:
+                # Bind this chunk's names, on_commit may run after the loop
+                transaction.on_commit(
+                    lambda names=images: remove_files(names)
+                )
+
+    invalidate_stats(user.pk)
+    return deleted
+
+
+def _purge_related(user, model, batch_size):
+    """Delete user's tags or ingredients and any links to them"""
+    through = getattr(Recipe, COUNTED_FIELDS[model]).through
+    column = f'{model._meta.model_name}_id'
+
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                model.objects.filter(user=user).order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            # Other users' recipes may still link to them
+            invalidate_stats(*set(
+                through.objects.filter(**{f'{column}__in': ids})
+                .values_list('recipe__user_id', flat=True)
+            ))
+            _delete_in(through, column, ids)
+            deleted += _delete_in(model, 'id', ids)
+
+    return deleted
+
+
+def purge_user(user, batch_size=DEFAULT_BATCH_SIZE):
+    """Delete a user and everything they own without Django's collector.
+
+    The cascade collector loads every related object before deleting it,
+    which for large catalogs is slow and memory hungry. Here recipes,
+    tags and ingredients go in batches of batch_size and only the user
+    row itself, with nothing much left to cascade to, goes through
+    Model.delete(). Returns a dict of model name -> rows deleted.
+    """
+    user_id = user.pk
+    deleted = {
+        'recipes': purge_recipes(user, batch_size),
+        'tags': _purge_related(user, Tag, batch_size),
+        'ingredients': _purge_related(user, Ingredient, batch_size),
+    }
+
+    revoke_user_tokens(user)
+    user.delete()
+    invalidate_stats(user_id)
+
+    return deleted
@@ -17,18 +17,27 @@ class UserSerializer(serializers.ModelSerializer):
         return get_user_model().objects.create_user(**validated_data)
 
     def update(self, instance, validated_data):
-        """Update a user, setting the password correctly and return it"""
+        """Update a user, setting the password correctly and return it.
+
+        Only the columns whose value actually changed are written, in a
+        single UPDATE, and nothing is written if none did.
+        """
         password = validated_data.pop('password', None)
-        # super() call the parent update() functoin in ModelSerializer,
-        # it then runs the extended functonality we added in this update
-        # function so that the password is removed/popped.
-        user = super().update(instance, validated_data)
+        changed = [
+            name for name, value in validated_data.items()
+            if getattr(instance, name) != value
+        ]
+        for name in changed:
+            setattr(instance, name, validated_data[name])
 
         if password:
-            user.set_password(password)
-            user.save()
+            instance.set_password(password)
+            changed.append('password')
+
+        if changed:
+            instance.save(update_fields=changed)
 
-        return user
+        return instance
 
 
 class AuthTokenSerializer(serializers.Serializer):
@@ -0,0 +1,94 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework import status
+
+from user.throttles import LoginThrottle, LoginIPThrottle, \
+    LoginEmailThrottle, login_cache, rejected_count
+
+TOKEN_URL = reverse('user:token')
+
+
+@patch.object(LoginIPThrottle, 'rate', '3/min', create=True)
+@patch.object(LoginEmailThrottle, 'rate', '2/min', create=True)
+class LoginThrottleTests(TestCase):
+    """Test rate limiting of the token endpoint"""
+
+    def setUp(self):
+        login_cache.clear()
+        self.client = APIClient()
+
+    def test_throttle_per_email(self):
+        """Test repeated attempts on one account are rejected"""
+        payload = {'email': 'raymond@test.com', 'password': 'wrong'}
+        for _ in range(2):
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Different casing still counts against the same account
+        payload['email'] = 'Raymond@Test.com'
+        with patch('user.serializers.authenticate') as authenticate:
+            res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        authenticate.assert_not_called()
+        self.assertEqual(rejected_count('login_email'), 1)
+
+    def test_throttle_per_ip(self):
+        """Test attempts on many accounts from one IP are rejected"""
+        for i in range(3):
+            res = self.client.post(
+                TOKEN_URL, {'email': f'user{i}@test.com', 'password': 'x'}
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            TOKEN_URL, {'email': 'user9@test.com', 'password': 'x'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(rejected_count('login_ip'), 1)
+
+    def test_other_ip_not_throttled(self):
+        """Test the IP limit is tracked per client address"""
+        for i in range(3):
+            self.client.post(
+                TOKEN_URL, {'email': f'user{i}@test.com', 'password': 'x'}
+            )
+
+        res = self.client.post(
+            TOKEN_URL, {'email': 'user9@test.com', 'password': 'x'},
+            REMOTE_ADDR='10.0.0.2'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_forwarded_for_not_trusted(self):
+        """Test rotating X-Forwarded-For doesn't reset the per-IP limit"""
+        for i in range(3):
+            res = self.client.post(
+                TOKEN_URL,
+                {'email': f'user{i}@test.com', 'password': 'wrong'},
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{i}'
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            TOKEN_URL,
+            {'email': 'user3@test.com', 'password': 'wrong'},
+            HTTP_X_FORWARDED_FOR='10.0.0.3'
+        )
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @patch.object(LoginThrottle, 'rate', '1/min', create=True)
+    def test_base_throttle_never_limits(self):
+        """Test a throttle without get_ident_for() lets requests through"""
+        request = APIRequestFactory().post(TOKEN_URL)
+        throttle = LoginThrottle()
+
+        self.assertTrue(throttle.allow_request(request, None))
+        self.assertIsNone(throttle.get_cache_key(request, None))
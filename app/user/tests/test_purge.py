@@ -0,0 +1,123 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+from core.tests.factories import create_user
+from user.purge import purge_recipes, purge_user
+
+ME_URL = reverse('user:me')
+
+
+def sample_catalog(user, recipes=3):
+    """Create recipes linked to a tag and an ingredient of user"""
+    tag = Tag.objects.create(user=user, name='Vegan')
+    ingredient = Ingredient.objects.create(user=user, name='Salt')
+    for i in range(recipes):
+        recipe = Recipe.objects.create(
+            user=user, title=f'Recipe {i}', time_minutes=5, price=5.00,
+            image=f'uploads/recipe/{i}.jpg'
+        )
+        recipe.tags.add(tag)
+        recipe.ingredients.add(ingredient)
+
+    return tag, ingredient
+
+
+@patch('user.purge.remove_files')
+class PurgeTests(TestCase):
+    """Test deleting users and recipes in batches"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.other = create_user('other@test.com')
+
+    def test_purge_user(self, remove_files):
+        """Test the user and everything they own is deleted"""
+        sample_catalog(self.user)
+        other_tag, _ = sample_catalog(self.other, recipes=1)
+        Token.objects.create(user=self.user)
+
+        deleted = purge_user(self.user, batch_size=2)
+
+        self.assertEqual(
+            deleted, {'recipes': 3, 'tags': 1, 'ingredients': 1}
+        )
+        self.assertFalse(
+            get_user_model().objects.filter(email='raymond@test.com').exists()
+        )
+        self.assertFalse(Token.objects.exists())
+        self.assertEqual(Recipe.objects.count(), 1)
+        self.assertEqual(Recipe.tags.through.objects.count(), 1)
+        other_tag.refresh_from_db()
+        self.assertEqual(other_tag.recipe_count, 1)
+
+    def test_shared_tag_counts(self, remove_files):
+        """Test counts of other users' tags linked to purged recipes"""
+        other_tag = Tag.objects.create(user=self.other, name='Shared')
+        recipe = Recipe.objects.create(
+            user=self.user, title='Borrowed', time_minutes=5, price=5.00
+        )
+        recipe.tags.add(other_tag)
+
+        purge_recipes(self.user)
+
+        other_tag.refresh_from_db()
+        self.assertEqual(other_tag.recipe_count, 0)
+        self.assertTrue(Tag.objects.filter(pk=other_tag.pk).exists())
+
+    def test_delete_me(self, remove_files):
+        """Test DELETE on the me endpoint purges the account"""
+        sample_catalog(self.user)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.delete(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+        self.assertFalse(
+            get_user_model().objects.filter(pk=self.user.pk).exists()
+        )
+
+    def test_command_recipes_only(self, remove_files):
+        """Test the command can keep the account"""
+        tag, ingredient = sample_catalog(self.user)
+
+        call_command('purge_user', 'raymond@test.com', '--recipes-only',
+                     stdout=StringIO())
+
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+        self.assertTrue(Tag.objects.filter(user=self.user).exists())
+        # The kept tags and ingredients no longer count the recipes
+        tag.refresh_from_db()
+        ingredient.refresh_from_db()
+        self.assertEqual((tag.recipe_count, ingredient.recipe_count), (0, 0))
+        self.assertTrue(
+            get_user_model().objects.filter(pk=self.user.pk).exists()
+        )
+
+
+class PurgeImageTests(TransactionTestCase):
+    """Test image files are removed once each batch commits"""
+
+    @patch('user.purge.remove_files')
+    def test_images_removed_after_commit(self, remove_files):
+        user = create_user()
+        sample_catalog(user)
+
+        purge_recipes(user, batch_size=2)
+
+        removed = [call[0][0] for call in remove_files.call_args_list]
+        self.assertEqual(removed, [
+            ['uploads/recipe/0.jpg', 'uploads/recipe/1.jpg'],
+            ['uploads/recipe/2.jpg'],
+        ])
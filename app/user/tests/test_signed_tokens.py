@@ -0,0 +1,198 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, \
+    override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+
+from core.authentication import SignedTokenAuthentication, \
+    issue_signed_token, revoked_users
+from user.purge import purge_user
+from user.throttles import login_cache
+
+TOKEN_URL = reverse('user:token')
+REFRESH_URL = reverse('user:refresh')
+ME_URL = reverse('user:me')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class EmailView(APIView):
+    """View reading a field signed-token users leave deferred"""
+    authentication_classes = (SignedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        return Response({'email': request.user.email})
+
+
+class SignedTokenTests(TestCase):
+    """Test the stateless signed token mode"""
+
+    def setUp(self):
+        login_cache.clear()
+        revoked_users.clear()
+        self.payload = {'email': 'raymond@test.com', 'password': 'test123'}
+        self.user = get_user_model().objects.create_user(
+            name='raymond', **self.payload
+        )
+        self.client = APIClient()
+
+    def authenticate(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_issue_signed_token(self):
+        """Test token_type=signed returns a bearer token"""
+        res = self.client.post(
+            TOKEN_URL, dict(self.payload, token_type='signed')
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['token_type'], 'Bearer')
+        self.authenticate(res.data['token'])
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data, {
+            'email': self.user.email,
+            'name': 'raymond',
+        })
+
+    def test_no_user_query(self):
+        """Test authenticating a signed token doesn't query the user"""
+        self.authenticate(issue_signed_token(self.user))
+
+        # The single query is the (empty) recipe list itself
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_tampered_token_rejected(self):
+        """Test a token with a broken signature is rejected"""
+        token = issue_signed_token(self.user)
+        self.authenticate(token[:-1] + ('A' if token[-1] != 'A' else 'B'))
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(SIGNED_TOKEN_TTL=-1)
+    def test_expired_token_rejected(self):
+        """Test signed tokens stop working after SIGNED_TOKEN_TTL"""
+        self.authenticate(issue_signed_token(self.user))
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(SIGNED_TOKEN_TTL=-1)
+    def test_refresh_token(self):
+        """Test an expired token can be exchanged for a working one"""
+        token = issue_signed_token(self.user)
+
+        res = self.client.post(REFRESH_URL, {'token': token})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with override_settings(SIGNED_TOKEN_TTL=60):
+            self.authenticate(res.data['token'])
+            res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_refresh_after_password_change(self):
+        """Test changing the password stops old tokens from refreshing"""
+        token = issue_signed_token(self.user)
+        self.user.set_password('newpassword')
+        self.user.save()
+
+        res = self.client.post(REFRESH_URL, {'token': token})
+
+        # The endpoint has no authenticators, so DRF answers 403
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_refresh_inactive_user(self):
+        """Test deactivated users can't refresh"""
+        token = issue_signed_token(self.user)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.post(REFRESH_URL, {'token': token})
+
+        # The endpoint has no authenticators, so DRF answers 403
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_purged_user_rejected(self):
+        """Test tokens of deleted users are rejected without a query"""
+        self.authenticate(issue_signed_token(self.user))
+        purge_user(self.user)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_of_user_deleted_elsewhere(self):
+        """Test reading the profile of a user another process deleted is
+        a 401"""
+        self.authenticate(issue_signed_token(self.user))
+        get_user_model().objects.filter(pk=self.user.pk).delete()
+        revoked_users.clear()  # this process never saw the deletion
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res['WWW-Authenticate'], 'Bearer')
+
+    def test_deferred_field_of_deleted_user(self):
+        """Test loading a deleted user's deferred field is a 401"""
+        request = APIRequestFactory().get(
+            '/', HTTP_AUTHORIZATION=f'Bearer {issue_signed_token(self.user)}'
+        )
+        get_user_model().objects.filter(pk=self.user.pk).delete()
+        revoked_users.clear()
+
+        res = EmailView.as_view()(request)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test tokens stop working while the user is deactivated"""
+        self.authenticate(issue_signed_token(self.user))
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user.is_active = True
+        self.user.save()
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class DeletedUserWriteTests(TransactionTestCase):
+    """Test writes with the token of a user deleted by another process.
+
+    TestCase defers foreign key checks to the end of the test, so the
+    failing INSERT needs real commits.
+    """
+
+    def test_user_deleted_elsewhere(self):
+        """Test a write by a user another process deleted is a 401"""
+        user = get_user_model().objects.create_user(
+            'raymond@test.com', 'test123'
+        )
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {issue_signed_token(user)}'
+        )
+        purge_user(user)
+        revoked_users.clear()  # this process never saw the deletion
+
+        res = client.post(RECIPES_URL, {
+            'title': 'Ghost soup', 'time_minutes': 5, 'price': 1.00
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res['WWW-Authenticate'], 'Bearer')
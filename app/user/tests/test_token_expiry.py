@@ -0,0 +1,123 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import RevocationSet, revoked_tokens
+from user.throttles import login_cache
+
+TOKEN_URL = reverse('user:token')
+REVOKE_URL = reverse('user:revoke')
+ME_URL = reverse('user:me')
+TTL = 3600
+
+
+def age_token(token, seconds):
+    """Pretend token was issued or refreshed seconds ago"""
+    Token.objects.filter(pk=token.pk).update(
+        created=timezone.now() - timedelta(seconds=seconds)
+    )
+
+
+@override_settings(TOKEN_TTL=TTL)
+class TokenExpiryTests(TestCase):
+    """Test token expiry, rolling refresh and revocation"""
+
+    def setUp(self):
+        login_cache.clear()
+        revoked_tokens.clear()
+        self.payload = {'email': 'raymond@test.com', 'password': 'test123'}
+        self.user = get_user_model().objects.create_user(**self.payload)
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_expired_token_rejected(self):
+        """Test tokens older than TOKEN_TTL can't authenticate"""
+        age_token(self.token, TTL + 1)
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_expired_token_rotated_on_login(self):
+        """Test logging in after expiry issues a new key"""
+        age_token(self.token, TTL + 1)
+
+        res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data['token'], self.token.key)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+
+    def test_valid_token_reused_on_login(self):
+        """Test logging in again returns the still valid token"""
+        res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.data['token'], self.token.key)
+
+    def test_rolling_refresh(self):
+        """Test using a token late in its life extends it"""
+        age_token(self.token, TTL * 3 // 4)
+
+        res = self.client.get(ME_URL)
+
+        self.token.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertLess(timezone.now() - self.token.created,
+                        timedelta(seconds=60))
+
+    def test_fresh_token_not_written(self):
+        """Test early in its life a token is only read"""
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_revoke_token(self):
+        """Test revoked tokens are rejected without a database query"""
+        res = self.client.post(REVOKE_URL)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_purge_expired_tokens(self):
+        """Test the purge command only deletes expired tokens"""
+        other = get_user_model().objects.create_user(
+            'other@test.com', 'test123'
+        )
+        expired = Token.objects.create(user=other)
+        age_token(expired, TTL + 1)
+
+        out = StringIO()
+        call_command('purge_expired_tokens', batch_size=1, stdout=out)
+
+        self.assertFalse(Token.objects.filter(key=expired.key).exists())
+        self.assertTrue(Token.objects.filter(key=self.token.key).exists())
+        self.assertIn('Purged 1 token(s)', out.getvalue())
+
+
+@override_settings(TOKEN_TTL=TTL)
+class RevocationSetTests(TestCase):
+
+    def test_bounded_size(self):
+        """Test the oldest keys are dropped once the set is full"""
+        revoked = RevocationSet(max_size=2)
+        for key in ('a', 'b', 'c'):
+            revoked.add(key)
+
+        self.assertNotIn('a', revoked)
+        self.assertIn('b', revoked)
+        self.assertIn('c', revoked)
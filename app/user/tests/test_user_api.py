@@ -1,25 +1,36 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.urls import reverse
 
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.authentication import issue_signed_token, revoked_tokens
+from core.tests.factories import create_user
+from user.throttles import login_cache
+
+# The production hasher setup, the test settings use a fast hasher
+PRODUCTION_HASHERS = [
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+]
+
 # Routes to user API endpoints (see urls.py file for route names)
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
 ME_URL = reverse('user:me')
 
 
-def create_user(**params):
-    # Helper function to shorter the create_user call
-    return get_user_model().objects.create_user(**params)
-
-
 class PublicUserApiTests(TestCase):
     """Test the user API (public)"""
 
     def setUp(self):
+        # Start every test with an empty login throttle history
+        login_cache.clear()
         self.client = APIClient()
 
     def test_create_valid_user_success(self):
@@ -94,6 +105,30 @@ class PublicUserApiTests(TestCase):
         self.assertNotIn('token', res.data)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    @override_settings(PASSWORD_HASHERS=PRODUCTION_HASHERS)
+    def test_create_user_hashed_with_argon2(self):
+        """Test new passwords are hashed with the preferred hasher"""
+        user = create_user(email='raymond@test.com', password='test123')
+
+        self.assertTrue(user.password.startswith('argon2$'))
+
+    @override_settings(PASSWORD_HASHERS=PRODUCTION_HASHERS)
+    def test_legacy_hash_upgraded_on_login(self):
+        """Test a PBKDF2 hash is replaced with Argon2 on next login"""
+        payload = {'email': 'raymond@test.com', 'password': 'test123'}
+        user = create_user(**payload)
+        user.password = make_password(
+            payload['password'], None, 'pbkdf2_sha256'
+        )
+        user.save()
+
+        res = self.client.post(TOKEN_URL, payload)
+
+        user.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(user.password.startswith('argon2$'))
+        self.assertTrue(user.check_password(payload['password']))
+
     # This is a test for security to ensure that public unauthorized
     # GET requests cannot retrieve any user details.
     def test_retrieve_user_unauthorized(self):
@@ -147,3 +182,55 @@ class PrivateUserAPITests(TestCase):
         self.assertEqual(self.user.name, payload['name'])
         self.assertTrue(self.user.check_password)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_single_query(self):
+        """Test a profile update writes only changed columns at once"""
+        payload = {'name': 'new name', 'password': 'newpassword'}
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(ME_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # One UPDATE for the user, one to revoke tokens after the
+        # password change
+        self.assertEqual(len(queries), 2)
+        update = queries[0]['sql']
+        self.assertTrue(update.startswith('UPDATE "core_user"'))
+        self.assertIn('"name"', update)
+        self.assertIn('"password"', update)
+        self.assertNotIn('"email"', update)
+        self.assertNotIn('"is_staff"', update)
+
+    def test_update_unchanged_no_write(self):
+        """Test an update without changes doesn't touch the database"""
+        with self.assertNumQueries(0):
+            res = self.client.patch(ME_URL, {'name': self.user.name})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_password_change_revokes_other_tokens(self):
+        """Test changing the password revokes tokens of other sessions"""
+        revoked_tokens.clear()
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {issue_signed_token(self.user)}'
+        )
+
+        res = client.patch(ME_URL, {'password': 'newpassword'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        self.assertIn(token.key, revoked_tokens)
+
+    def test_password_change_keeps_current_token(self):
+        """Test the token used to change the password stays valid"""
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        res = client.patch(ME_URL, {'password': 'newpassword'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
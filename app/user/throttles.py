@@ -0,0 +1,70 @@
+import logging
+
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+logger = logging.getLogger(__name__)
+
+# Login attempts are tracked in a dedicated per-process memory cache so a
+# flood of bad credentials never reaches the database or a shared cache
+login_cache = caches['throttle']
+
+
+def rejected_key(scope):
+    """Return the cache key counting rejected attempts for a scope"""
+    return f'login-rejected:{scope}'
+
+
+def rejected_count(scope):
+    """Return how many login attempts were throttled for a scope"""
+    return login_cache.get(rejected_key(scope), 0)
+
+
+class LoginThrottle(SimpleRateThrottle):
+    """Sliding window throttle for the token endpoint.
+
+    Runs in APIView.initial(), i.e. before the serializer calls
+    authenticate(), so throttled attempts never pay for a password hash.
+    """
+    cache = login_cache
+
+    def get_ident_for(self, request):
+        """Return the value attempts are grouped by, or None to skip.
+        Subclasses override it, the base throttle never limits anything"""
+        return None
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_for(request)
+        if not ident:
+            return None
+
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def throttle_failure(self):
+        """Count and log the rejected attempt"""
+        key = rejected_key(self.scope)
+        if not self.cache.add(key, 1, None):
+            self.cache.incr(key)
+        logger.warning('Login attempt throttled (%s)', self.scope)
+
+        return False
+
+
+class LoginIPThrottle(LoginThrottle):
+    """Throttle login attempts per client IP"""
+    scope = 'login_ip'
+
+    def get_ident_for(self, request):
+        return self.get_ident(request)
+
+
+class LoginEmailThrottle(LoginThrottle):
+    """Throttle login attempts per account email, whatever the IP"""
+    scope = 'login_email'
+
+    def get_ident_for(self, request):
+        email = request.data.get('email')
+        if not isinstance(email, str):
+            return None
+
+        return email.strip().lower()
@@ -1,7 +1,19 @@
-from rest_framework import generics, authentication, permissions
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions, generics, permissions, status
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from core.authentication import ExpiringTokenAuthentication, \
+    SignedTokenAuthentication, issue_token, issue_signed_token, \
+    refresh_signed_token, revoke_token, revoke_user_tokens
+from user.purge import purge_user
 from user.serializers import UserSerializer, AuthTokenSerializer
+from user.throttles import LoginIPThrottle, LoginEmailThrottle
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -14,12 +26,68 @@ class CreateTokenView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     # renderer makes it possible to POST to this endpoint from a browser
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    # Rejected before the serializer runs authenticate(), see throttles.py
+    throttle_classes = (LoginIPThrottle, LoginEmailThrottle)
+
+    def post(self, request, *args, **kwargs):
+        """Return the user's token, issuing a new one if it expired.
+
+        With token_type=signed a short lived stateless token is returned
+        instead, see core.authentication.SignedTokenAuthentication.
+        """
+        serializer = self.serializer_class(
+            data=request.data,
+            context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+
+        if request.data.get('token_type') == 'signed':
+            return Response({
+                'token': issue_signed_token(user),
+                'token_type': SignedTokenAuthentication.keyword,
+                'expires_in': settings.SIGNED_TOKEN_TTL,
+            })
+
+        return Response({'token': issue_token(user).key})
+
+
+class RefreshTokenView(APIView):
+    """Exchange a recently issued signed token for a fresh one"""
+    authentication_classes = ()
+    permission_classes = ()
+    throttle_classes = (LoginIPThrottle,)
+
+    def post(self, request):
+        token = request.data.get('token')
+        if not isinstance(token, str):
+            return Response(
+                {'token': ['This field is required.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            'token': refresh_signed_token(token),
+            'token_type': SignedTokenAuthentication.keyword,
+            'expires_in': settings.SIGNED_TOKEN_TTL,
+        })
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class RevokeTokenView(APIView):
+    """Revoke the token used to authenticate the request (log out)"""
+    authentication_classes = (ExpiringTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request):
+        revoke_token(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ManageUserView(generics.RetrieveUpdateDestroyAPIView):
     """Manage the authenticated user"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (ExpiringTokenAuthentication,
+                              SignedTokenAuthentication)
     permission_classes = (permissions.IsAuthenticated,)
 
     # Normally the generic APIView will return a queryset of db objects
@@ -28,4 +96,33 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         """Retrieve and return authenticated user"""
         # The authentication class will assign an authenticated user to request
-        return self.request.user
+        user = self.request.user
+        if user.get_deferred_fields():
+            # Signed tokens only carry the pk, load the rest in one query;
+            # another process may have deleted or deactivated the user
+            user = get_user_model().objects.filter(
+                pk=user.pk, is_active=True
+            ).first()
+            if user is None:
+                raise exceptions.AuthenticationFailed(
+                    _('User inactive or deleted.')
+                )
+
+        return user
+
+    def perform_update(self, serializer):
+        """Save the user, revoking other tokens if the password changed"""
+        serializer.save()
+
+        if serializer.validated_data.get('password'):
+            # Signed tokens can no longer be refreshed once the password
+            # changes, database tokens other than this one are revoked
+            auth = self.request.auth
+            revoke_user_tokens(
+                serializer.instance,
+                keep=auth if isinstance(auth, Token) else None
+            )
+
+    def perform_destroy(self, instance):
+        """Delete the account and all of its data in batches"""
+        purge_user(instance)